@@ -1,12 +1,43 @@
-from fastapi import APIRouter
-from typing import List, Dict, Optional
+from fastapi import APIRouter, Header, HTTPException, Query, Response
+from typing import List, Dict, Literal, Optional
 from pydantic import BaseModel
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta, timezone
+import hashlib
+import os
 import numpy as np
 import pandas as pd
 
+from app.auth import AuthorizedUser
+from app.libs.downsampling import lttb_indices
+from app.libs.fast_json import FastJSONResponse
+from databutton_app.lru_cache import LRUCache
+from app.libs.sales_events import sales_event_store
+from app.libs.synthetic_data import time_series
+from databutton_app.metrics import registry, stage_timer
+
 router = APIRouter()
 
+# Serve random data instead of the seller's events, for demos
+ANALYTICS_MOCK_DATA = os.environ.get("ANALYTICS_MOCK_DATA", "false").lower() == "true"
+PLATFORMS = ['Poshmark', 'Mercari', 'eBay']
+TREND_DAYS = 30
+MAX_INGEST_EVENTS = 50_000
+# Trends longer than this are downsampled, so payloads stay bounded for any range
+DEFAULT_TREND_POINTS = 200
+MAX_TREND_POINTS = 1000
+# Buckets a trend may span before downsampling, e.g. about 27 years of days
+MAX_TREND_BUCKETS = 10_000
+
+Resolution = Literal["auto", "day", "week", "month"]
+
+# Computed summaries, keyed by user and query, tagged with the seller's data version
+summary_cache = LRUCache(maxsize=int(os.environ.get("SUMMARY_CACHE_SIZE", "1024")))
+summary_requests = registry.counter(
+    "analytics_summary_requests_total",
+    "Summary requests by outcome: hit, miss or not_modified (304)",
+    ("result",),
+)
+
 class SalesByPlatform(BaseModel):
     platform: str
     total_sales: int
@@ -30,6 +61,21 @@ class PlatformBreakdown(BaseModel):
     value: float
     percentage: float
 
+class SalesEvent(BaseModel):
+    event_type: Literal["listed", "sold", "delisted"]
+    platform: str
+    item_id: str
+    category: str = "Uncategorized"
+    price: float = 0  # Sale price for sold events, asking price for listings
+    cost: Optional[float] = None  # What the seller paid for the item, if known
+    occurred_at: datetime
+
+class IngestEventsRequest(BaseModel):
+    events: List[SalesEvent]
+
+class IngestEventsResponse(BaseModel):
+    ingested: int
+
 class AnalyticsSummary(BaseModel):
     total_revenue: float
     total_sales: int
@@ -39,27 +85,19 @@ class AnalyticsSummary(BaseModel):
     inventory_metrics: InventoryMetrics
     revenue_trend: List[TimeSeriesPoint]
     sales_trend: List[TimeSeriesPoint]
+    trend_resolution: str = "day"  # Bucket size of the trend points
     platform_revenue_breakdown: List[PlatformBreakdown]
     top_categories: List[PlatformBreakdown]
 
 def generate_mock_time_series(base_value: float, days: int, trend: float = 0.1, volatility: float = 0.2) -> List[TimeSeriesPoint]:
     """Generate mock time series data with trend and volatility"""
-    dates = [datetime.now() - timedelta(days=x) for x in range(days)]
-    values = []
-    current = base_value
-    
-    for i in range(days):
-        # Add trend and random noise
-        change = current * (trend/days + np.random.normal(0, volatility))
-        current += change
-        values.append(max(current, 0))  # Ensure non-negative
-    
+    columns = time_series(base_value, days, trend=trend, volatility=volatility)
     return [
-        TimeSeriesPoint(
-            date=date.strftime('%Y-%m-%d'),
-            value=round(value, 2)
+        TimeSeriesPoint(date=day, value=value)
+        for day, value in zip(
+            np.datetime_as_string(columns["date"]).tolist(),
+            np.round(columns["value"], 2).tolist(),
         )
-        for date, value in zip(dates, values)
     ]
 
 def calculate_growth_rate(values: List[float]) -> float:
@@ -68,11 +106,247 @@ def calculate_growth_rate(values: List[float]) -> float:
         return 0.0
     return ((values[-1] - values[-2]) / values[-2]) * 100
 
-@router.get("/summary")
-def get_analytics_summary() -> AnalyticsSummary:
+def percentage(value: float, total: float) -> float:
+    return round((value / total) * 100, 1) if total else 0.0
+
+def bucket_starts(start: date, end: date, resolution: str) -> List[date]:
+    """Start dates of the day, week (from Monday) or month buckets covering start to end"""
+    if resolution == "day":
+        return [start + timedelta(days=i) for i in range((end - start).days + 1)]
+    if resolution == "week":
+        first = start - timedelta(days=start.weekday())
+        return [first + timedelta(weeks=i) for i in range((end - first).days // 7 + 1)]
+    months = (end.year - start.year) * 12 + end.month - start.month + 1
+    return [
+        date(start.year + (start.month - 1 + i) // 12, (start.month - 1 + i) % 12 + 1, 1)
+        for i in range(months)
+    ]
+
+def bucket_count(start: date, end: date, resolution: str) -> int:
+    """Number of buckets bucket_starts returns, without building them"""
+    if resolution == "day":
+        return (end - start).days + 1
+    if resolution == "week":
+        return (end.toordinal() - start.toordinal() + start.weekday()) // 7 + 1
+    return (end.year - start.year) * 12 + end.month - start.month + 1
+
+def choose_resolution(start: date, end: date, max_points: int) -> str:
+    """Finest resolution with at most max_points buckets, months if none fits"""
+    for resolution in ("day", "week"):
+        if bucket_count(start, end, resolution) <= max_points:
+            return resolution
+    return "month"
+
+def resolve_trend_range(
+    start: Optional[date], end: Optional[date], resolution: Resolution, max_points: int
+) -> tuple:
+    """Fill in the default range and resolution of the trends.
+
+    Raises ValueError for ranges that are reversed, reach before the first
+    representable date or need more than MAX_TREND_BUCKETS buckets.
+    """
+    end = end or datetime.now(timezone.utc).date()
+    if start is None:
+        if (end - date.min).days < TREND_DAYS - 1:
+            raise ValueError(f"end must leave room for the default {TREND_DAYS} day range")
+        start = end - timedelta(days=TREND_DAYS - 1)
+    if start > end:
+        raise ValueError("start must not be after end")
+    if resolution == "auto":
+        resolution = choose_resolution(start, end, max_points)
+    if bucket_count(start, end, resolution) > MAX_TREND_BUCKETS:
+        raise ValueError(
+            f"Range too long for {resolution} resolution, at most {MAX_TREND_BUCKETS} buckets"
+        )
+    return start, end, resolution
+
+def build_time_series(rows: List[tuple], buckets: List[date], max_points: int) -> tuple:
+    """Revenue and sales series with one point per bucket, downsampled to max_points.
+
+    Buckets without activity are zero. Series longer than max_points are
+    reduced with LTTB, which keeps the peaks and dips a chart should show.
+    Both series keep the same buckets, so they line up on a shared axis:
+    LTTB picks half of them for revenue and half for sales.
+    """
+    by_bucket = {bucket: (sales, revenue) for bucket, sales, revenue in rows}
+    dates = [bucket.isoformat() for bucket in buckets]
+    sales = [by_bucket.get(day, (0, 0.0))[0] for day in dates]
+    revenue = [round(by_bucket.get(day, (0, 0.0))[1], 2) for day in dates]
+
+    if len(dates) <= max_points:
+        kept = range(len(dates))
+    else:
+        kept = sorted(
+            set(lttb_indices(revenue, (max_points + 1) // 2))
+            | set(lttb_indices(sales, max_points // 2))
+        )
+    revenue_trend = [TimeSeriesPoint(date=dates[i], value=revenue[i]) for i in kept]
+    sales_trend = [TimeSeriesPoint(date=dates[i], value=sales[i]) for i in kept]
+    return revenue_trend, sales_trend
+
+def compute_analytics_summary(
+    user_id: str,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    resolution: Resolution = "auto",
+    max_points: int = DEFAULT_TREND_POINTS,
+) -> AnalyticsSummary:
+    """Build the summary from the seller's pre-aggregated rollups.
+
+    start, end and resolution only apply to the trends, which default to
+    the last TREND_DAYS days. Totals cover all time and growth rates
+    always compare the last TREND_DAYS days with the ones before.
+    """
+    today = datetime.now(timezone.utc)
+    trend_start = today - timedelta(days=TREND_DAYS - 1)
+    previous_start = trend_start - timedelta(days=TREND_DAYS)
+    previous_end = trend_start - timedelta(days=1)
+
+    start, end, resolution = resolve_trend_range(start, end, resolution, max_points)
+
+    with sales_event_store.snapshot() as conn:
+        platform_totals = sales_event_store.platform_totals(user_id, conn)
+        category_totals = sales_event_store.category_totals(user_id, conn)
+        inventory = sales_event_store.inventory(user_id, conn)
+        series = sales_event_store.series(user_id, start, end, resolution, conn)
+        current_revenue = sales_event_store.platform_revenue(
+            user_id, trend_start.date(), today.date(), conn
+        )
+        previous_revenue = sales_event_store.platform_revenue(
+            user_id, previous_start.date(), previous_end.date(), conn
+        )
+
+    totals_by_platform = {p["platform"]: p for p in platform_totals}
+    platform_metrics = []
+    for platform in PLATFORMS + sorted(set(totals_by_platform) - set(PLATFORMS)):
+        totals = totals_by_platform.get(platform, {"sales": 0, "revenue": 0.0})
+        platform_metrics.append(SalesByPlatform(
+            platform=platform,
+            total_sales=totals["sales"],
+            total_revenue=round(totals["revenue"], 2),
+            average_price=round(totals["revenue"] / totals["sales"], 2) if totals["sales"] else 0.0,
+            growth_rate=round(calculate_growth_rate([
+                previous_revenue.get(platform, 0.0),
+                current_revenue.get(platform, 0.0),
+            ]), 1)
+        ))
+
+    total_revenue = sum(p["revenue"] for p in platform_totals)
+    total_sales = sum(p["sales"] for p in platform_totals)
+    total_cost = sum(p["cost"] for p in platform_totals)
+    costed_revenue = sum(p["costed_revenue"] for p in platform_totals)
+
+    inventory_metrics = InventoryMetrics(
+        total_items=inventory["total_items"],
+        active_listings=inventory["active"],
+        sold_items=inventory["sold"],
+        average_days_to_sell=round(inventory["average_days_to_sell"], 1),
+        turnover_rate=round(inventory["sold"] / inventory["total_items"], 2) if inventory["total_items"] else 0.0
+    )
+
+    revenue_trend, sales_trend = build_time_series(
+        series, bucket_starts(start, end, resolution), max_points
+    )
+
+    platform_breakdown = [
+        PlatformBreakdown(
+            platform=p.platform,
+            value=p.total_revenue,
+            percentage=percentage(p.total_revenue, total_revenue)
+        )
+        for p in platform_metrics
+    ]
+    top_categories = [
+        PlatformBreakdown(
+            platform=c["category"],
+            value=round(c["revenue"], 2),
+            percentage=percentage(c["revenue"], total_revenue)
+        )
+        for c in category_totals[:5]
+    ]
+
+    return AnalyticsSummary(
+        total_revenue=round(total_revenue, 2),
+        total_sales=total_sales,
+        average_price=round(total_revenue / total_sales, 2) if total_sales else 0.0,
+        profit_margin=percentage(costed_revenue - total_cost, costed_revenue),
+        platform_metrics=platform_metrics,
+        inventory_metrics=inventory_metrics,
+        revenue_trend=revenue_trend,
+        sales_trend=sales_trend,
+        trend_resolution=resolution,
+        platform_revenue_breakdown=sorted(platform_breakdown, key=lambda x: x.value, reverse=True),
+        top_categories=top_categories
+    )
+
+@router.post("/events")
+def ingest_sales_events(body: IngestEventsRequest, user: AuthorizedUser) -> IngestEventsResponse:
+    """Record listing and sales events and update the seller's rollups"""
+    if len(body.events) > MAX_INGEST_EVENTS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {MAX_INGEST_EVENTS} events can be ingested per request"
+        )
+    with stage_timer("analytics_ingest"):
+        ingested = sales_event_store.ingest(user.sub, body.events)
+    return IngestEventsResponse(ingested=ingested)
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header matches etag, using weak comparison as RFC 9110 asks"""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in [tag.removeprefix("W/") for tag in candidates]
+
+@router.get("/summary", response_model=AnalyticsSummary)
+def get_analytics_summary(
+    user: AuthorizedUser,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    resolution: Resolution = "auto",
+    max_points: int = Query(DEFAULT_TREND_POINTS, ge=3, le=MAX_TREND_POINTS),
+    if_none_match: Optional[str] = Header(None),
+):
+    """Get comprehensive analytics summary computed from the seller's sales events.
+
+    Trends cover start to end (default the last 30 days) at the given
+    resolution; "auto" picks the finest one that fits in max_points.
+    Summaries are cached until the seller ingests new events, and carry an
+    ETag so unchanged polls get a 304 without a body.
+    """
+    try:
+        resolve_trend_range(start, end, resolution, max_points)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if ANALYTICS_MOCK_DATA:
+        return FastJSONResponse(generate_mock_analytics_summary())
+
+    # Default ranges and growth windows move with the date, so it is part of the key
+    key = (user.sub, start, end, resolution, max_points, datetime.now(timezone.utc).date())
+    version = sales_event_store.version(user.sub)
+    cached = summary_cache.get(key)
+    if cached is not None and cached[0] == version:
+        _, etag, body = cached
+        result = "hit"
+    else:
+        with stage_timer("analytics_summary"):
+            summary = compute_analytics_summary(user.sub, start, end, resolution, max_points)
+            body = summary.model_dump_json().encode()
+        etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        summary_cache.set(key, (version, etag, body))
+        result = "miss"
+
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(if_none_match, etag):
+        summary_requests.inc("not_modified")
+        return Response(status_code=304, headers=headers)
+    summary_requests.inc(result)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+def generate_mock_analytics_summary() -> AnalyticsSummary:
     """Get comprehensive analytics summary with mock data"""
     # Mock platform metrics
-    platforms = ['Poshmark', 'Mercari', 'eBay']
+    platforms = PLATFORMS
     platform_metrics = []
     total_revenue = 0
     total_sales = 0
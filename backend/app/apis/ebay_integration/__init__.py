@@ -1,11 +1,28 @@
+import hashlib
+import logging
+import os
+import time
 from typing import List, Optional
 from fastapi import APIRouter
 from pydantic import BaseModel
 import requests
 from datetime import datetime
 import databutton as db
+from app.libs.call_budget import CallBudget, Priority
+from databutton_app.metrics import upstream_call
+from databutton_app.shared_cache import shared_cache
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
+
+EBAY_TOKEN_CACHE_KEY = "ebay:oauth_token"
+EBAY_SEARCH_CACHE_TTL = float(os.environ.get("EBAY_SEARCH_CACHE_TTL", "300"))
+# How long past freshness search results may still stand in when the call budget is low
+EBAY_STALE_TTL = float(os.environ.get("EBAY_STALE_TTL", "86400"))
+# Browse API calls per day for the whole application, as granted by eBay
+EBAY_DAILY_CALL_LIMIT = int(os.environ.get("EBAY_DAILY_CALL_LIMIT", "5000"))
+
+ebay_search_budget = CallBudget("ebay_search", limit=EBAY_DAILY_CALL_LIMIT)
 
 class EbayListing(BaseModel):
     title: str
@@ -15,7 +32,11 @@ class EbayListing(BaseModel):
     date_listed: str
 
 def get_ebay_oauth_token() -> str:
-    """Get OAuth token for eBay API"""
+    """Get OAuth token for eBay API, shared by all workers until shortly before it expires"""
+    token = shared_cache.get(EBAY_TOKEN_CACHE_KEY)
+    if token is not None:
+        return token
+
     client_id = db.secrets.get("EBAY_PROD_CLIENT_ID")
     client_secret = db.secrets.get("EBAY_PROD_CLIENT_SECRET")
     
@@ -30,21 +51,53 @@ def get_ebay_oauth_token() -> str:
         "scope": "https://api.ebay.com/oauth/api_scope"
     }
     
-    response = requests.post(
-        auth_url,
-        headers=headers,
-        data=data,
-        auth=(client_id, client_secret)
-    )
+    with upstream_call("ebay_oauth") as call:
+        response = requests.post(
+            auth_url,
+            headers=headers,
+            data=data,
+            auth=(client_id, client_secret)
+        )
+        if response.status_code != 200:
+            call.failed()
     
     if response.status_code != 200:
-        print(f"Error getting OAuth token: {response.text}")
+        logger.error("Error getting OAuth token: %s", response.text)
         raise Exception("Failed to get OAuth token")
         
-    return response.json()["access_token"]
+    payload = response.json()
+    token = payload["access_token"]
+    shared_cache.set(
+        EBAY_TOKEN_CACHE_KEY, token, ttl=max(payload.get("expires_in", 7200) - 60, 60)
+    )
+    return token
+
+def search_ebay_listings(
+    keywords: str,
+    condition: Optional[str] = None,
+    refresh: bool = False,
+    ttl: Optional[float] = None,
+    priority: Priority = "interactive",
+) -> List[EbayListing]:
+    """Search eBay for active listings, cached across workers.
+
+    Results are fresh for ttl seconds, EBAY_SEARCH_CACHE_TTL by default.
+    With refresh they are fetched again even if fresh. Calls are taken from
+    the daily eBay budget at the given priority; when it runs low, results
+    up to EBAY_STALE_TTL old are served instead.
+    """
+    cache_key = "ebay:listings:" + hashlib.sha256(f"{keywords}\0{condition}".encode()).hexdigest()
+    cached = shared_cache.get(cache_key)
+    if cached is not None and not refresh and cached["fresh_until"] > time.time():
+        return [EbayListing(**listing) for listing in cached["listings"]]
+
+    if not ebay_search_budget.try_acquire(priority, fallback=cached is not None):
+        if cached is not None:
+            logger.info("eBay call budget low, serving cached results for %r", keywords)
+            return [EbayListing(**listing) for listing in cached["listings"]]
+        logger.warning("eBay call budget exhausted, skipping search for %r", keywords)
+        return []
 
-def search_ebay_listings(keywords: str, condition: Optional[str] = None) -> List[EbayListing]:
-    """Search eBay for active listings"""
     token = get_ebay_oauth_token()
     
     headers = {
@@ -62,15 +115,21 @@ def search_ebay_listings(keywords: str, condition: Optional[str] = None) -> List
         "limit": 100
     }
     
-    response = requests.get(
-        "https://api.ebay.com/buy/browse/v1/item_summary/search",
-        headers=headers,
-        params=params
-    )
+    with upstream_call("ebay_search") as call:
+        response = requests.get(
+            "https://api.ebay.com/buy/browse/v1/item_summary/search",
+            headers=headers,
+            params=params
+        )
+        if response.status_code != 200:
+            call.failed()
     
+    if response.status_code == 429:
+        # Quota spent earlier than our count says, e.g. by another deployment
+        ebay_search_budget.exhaust()
     if response.status_code != 200:
-        print(f"Error searching eBay: {response.text}")
-        return []
+        logger.error("Error searching eBay: %s", response.text)
+        return [EbayListing(**listing) for listing in cached["listings"]] if cached else []
     
     data = response.json()
     listings = []
@@ -84,4 +143,10 @@ def search_ebay_listings(keywords: str, condition: Optional[str] = None) -> List
             date_listed=item.get("itemCreationDate", datetime.now().isoformat())
         ))
     
+    ttl = ttl or EBAY_SEARCH_CACHE_TTL
+    shared_cache.set(
+        cache_key,
+        {"fresh_until": time.time() + ttl, "listings": [listing.model_dump() for listing in listings]},
+        ttl=ttl + EBAY_STALE_TTL,
+    )
     return listings
@@ -1,25 +1,30 @@
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-import nltk
 import cv2
 import numpy as np
+import os
+import queue
 import requests
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 from io import BytesIO
 import base64
 import re
-from nltk.tokenize import word_tokenize
-from nltk.corpus import stopwords
-from nltk.tag import pos_tag
+from databutton_app.lru_cache import LRUCache
+from app.libs.perceptual_hash_cache import PerceptualHashCache
+from databutton_app.metrics import stage_timer, upstream_call
+from app.libs.nltk_resources import pos_tag_sents, verify_nltk_resources, word_tokenize
 # Removed product identification import until it's fixed
 
 router = APIRouter()
 
-# Download required NLTK data
-print('Downloading NLTK data...')
-nltk.download('punkt', quiet=True)
-nltk.download('averaged_perceptron_tagger', quiet=True)
-nltk.download('stopwords', quiet=True)
-print('NLTK data downloaded successfully')
+@router.on_event("startup")
+def check_nltk_data():
+    """Verify NLTK data is provisioned locally, tagger models load on first use"""
+    verify_nltk_resources()
 
 class GenerateTitleRequest(BaseModel):
     product_name: str
@@ -42,6 +47,30 @@ class GenerateDescriptionRequest(BaseModel):
 class GenerateDescriptionResponse(BaseModel):
     description: str
 
+class BulkListingItem(BaseModel):
+    title: GenerateTitleRequest | None = None
+    description: GenerateDescriptionRequest | None = None
+
+class GenerateListingsBulkRequest(BaseModel):
+    items: list[BulkListingItem]
+
+class BulkListingResult(BaseModel):
+    index: int
+    title: str | None = None
+    description: str | None = None
+    error: str | None = None
+
+class CacheStats(BaseModel):
+    size: int
+    maxsize: int
+    hits: int
+    misses: int
+    hit_rate: float
+
+class TitleCacheStatsResponse(BaseModel):
+    pos_tags: CacheStats
+    titles: CacheStats
+
 class AnalyzeConditionRequest(BaseModel):
     image_url: str
     product_name: str | None = None
@@ -52,141 +81,482 @@ class AnalyzeConditionResponse(BaseModel):
     details: str
     confidence: float
 
+class AnalyzeConditionBatchRequest(BaseModel):
+    image_urls: list[str]
+    product_name: str | None = None
+    category: str | None = None
+
+class AnalyzeConditionBatchResult(BaseModel):
+    index: int
+    image_url: str
+    result: AnalyzeConditionResponse | None = None
+    error: str | None = None
+
+# Image download limits for condition analysis
+IMAGE_DOWNLOAD_TIMEOUT = (5, 20)  # Connect, read seconds
+IMAGE_DOWNLOAD_CHUNK_SIZE = 64 * 1024
+MAX_IMAGE_BYTES = int(os.environ.get("MAX_CONDITION_IMAGE_MB", "20")) * 1024 * 1024
+
+# Longest side, in pixels, images are scaled to before feature extraction
+ANALYSIS_SIZE = 512
+
+# Pooled connections shared by all image downloads in this worker
+image_session = requests.Session()
+image_adapter = HTTPAdapter(pool_connections=8, pool_maxsize=32, max_retries=1)
+image_session.mount("http://", image_adapter)
+image_session.mount("https://", image_adapter)
+
+class ImageTooLargeError(ValueError):
+    pass
+
+def download_image(url: str) -> bytes:
+    """Stream an image into memory, refusing anything over MAX_IMAGE_BYTES"""
+    with (
+        upstream_call("image_download"),
+        image_session.get(url, stream=True, timeout=IMAGE_DOWNLOAD_TIMEOUT) as response,
+    ):
+        response.raise_for_status()
+
+        content_length = response.headers.get("Content-Length")
+        if content_length and content_length.isdigit() and int(content_length) > MAX_IMAGE_BYTES:
+            raise ImageTooLargeError(f"Image exceeds {MAX_IMAGE_BYTES} bytes")
+
+        data = bytearray()
+        for chunk in response.iter_content(IMAGE_DOWNLOAD_CHUNK_SIZE):
+            data.extend(chunk)
+            if len(data) > MAX_IMAGE_BYTES:
+                raise ImageTooLargeError(f"Image exceeds {MAX_IMAGE_BYTES} bytes")
+    return bytes(data)
+
+def decode_for_analysis(data: bytes) -> np.ndarray:
+    """Decode an image at reduced resolution and fit it within ANALYSIS_SIZE.
+
+    JPEGs are decoded at a quarter of their size directly from the DCT
+    coefficients, which is much cheaper than a full decode followed by a
+    resize. Images that come out smaller than the analysis size are decoded
+    again at full resolution.
+    """
+    img_array = np.frombuffer(data, np.uint8)
+    img = cv2.imdecode(img_array, cv2.IMREAD_REDUCED_COLOR_4)
+    if img is None or max(img.shape[:2]) < ANALYSIS_SIZE:
+        img = cv2.imdecode(img_array, cv2.IMREAD_COLOR)
+    if img is None:
+        raise ValueError("Could not decode image")
+
+    height, width = img.shape[:2]
+    scale = ANALYSIS_SIZE / max(height, width)
+    if scale < 1:
+        size = (max(1, round(width * scale)), max(1, round(height * scale)))
+        img = cv2.resize(img, size, interpolation=cv2.INTER_AREA)
+    return img
+
+class FeatureBuffers(threading.local):
+    """Per-thread output arrays reused across the grayscale, edge and HSV passes"""
+
+    shape = None
+
+    def get(self, shape: tuple[int, int]):
+        if self.shape != shape:
+            self.shape = shape
+            self.gray = np.empty(shape, np.uint8)
+            self.edges = np.empty(shape, np.uint8)
+            self.hsv = np.empty((*shape, 3), np.uint8)
+        return self
+
+feature_buffers = FeatureBuffers()
+
+# Worker pools for batch condition analysis. Downloads are I/O bound, while
+# OpenCV releases the GIL so feature extraction scales across threads too.
+MAX_CONDITION_BATCH_SIZE = 200
+# Longest a batch may take before unfinished images are reported as timed out
+CONDITION_BATCH_TIMEOUT = float(os.environ.get("CONDITION_BATCH_TIMEOUT", "120"))
+download_executor = ThreadPoolExecutor(
+    max_workers=int(os.environ.get("CONDITION_DOWNLOAD_WORKERS", "16")),
+    thread_name_prefix="condition-download",
+)
+analysis_executor = ThreadPoolExecutor(
+    max_workers=int(os.environ.get("CONDITION_ANALYSIS_WORKERS", str(os.cpu_count() or 2))),
+    thread_name_prefix="condition-analysis",
+)
+
+def extract_condition_features(img: np.ndarray) -> tuple[float, float, float]:
+    """Return brightness, edge density and mean saturation of a BGR image"""
+    buffers = feature_buffers.get(img.shape[:2])
+
+    # Convert to grayscale
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY, dst=buffers.gray)
+    brightness = cv2.mean(gray)[0]
+
+    # Edge detection for wear and damage
+    edges = cv2.Canny(gray, 100, 200, edges=buffers.edges)
+    edge_density = cv2.countNonZero(edges) / edges.size
+
+    # Color analysis for fading
+    hsv = cv2.cvtColor(img, cv2.COLOR_BGR2HSV, dst=buffers.hsv)
+    saturation = cv2.mean(hsv)[1]
+
+    return brightness, edge_density, saturation
+
+def classify_condition(brightness: float, edge_density: float, saturation: float) -> AnalyzeConditionResponse:
+    """Map image features to a condition grade"""
+    if edge_density < 0.05 and brightness > 200 and saturation > 150:
+        condition = "New"
+        details = "Product appears to be in new condition with vibrant colors and minimal texture or wear patterns."
+        confidence = 0.9
+    elif edge_density < 0.1 and brightness > 180 and saturation > 130:
+        condition = "Like New"
+        details = "Product shows very minimal signs of use with good overall appearance and color retention."
+        confidence = 0.85
+    elif edge_density < 0.15 and brightness > 150 and saturation > 110:
+        condition = "Very Good"
+        details = "Product shows some minor wear but maintains good overall condition and coloring."
+        confidence = 0.8
+    elif edge_density < 0.2 and brightness > 120:
+        condition = "Good"
+        details = "Product shows normal signs of wear and use with some color fading."
+        confidence = 0.75
+    elif edge_density < 0.25:
+        condition = "Fair"
+        details = "Product shows significant wear and may have some damage. Colors appear faded."
+        confidence = 0.7
+    else:
+        condition = "Poor"
+        details = "Product shows heavy wear and may need repair. Significant fading and wear patterns visible."
+        confidence = 0.65
+
+    return AnalyzeConditionResponse(
+        condition=condition,
+        details=details,
+        confidence=confidence
+    )
+
+MAX_TITLE_LENGTH = 80
+
+def join_title_parts(request: GenerateTitleRequest) -> str:
+    """Join brand, name, condition and up to 2 key features into a raw title"""
+    parts = [request.product_name]
+    if request.brand:
+        parts.insert(0, request.brand)
+    if request.condition:
+        parts.append(request.condition)
+    if request.key_features:
+        # Add up to 2 key features
+        parts.extend(request.key_features[:2])
+    return " | ".join(parts)
+
+def compress_title(pos_tags: list[tuple[str, str]], brand: str | None) -> str:
+    """Keep the first 8 nouns, adjectives and brand words of a tagged title"""
+    important_words = [word for word, tag in pos_tags
+                       if tag.startswith(('NN', 'JJ'))
+                       or (brand and word.lower() in brand.lower())]
+    return " ".join(important_words[:8])
+
+# Catalog titles repeat heavily, so tagging results and final titles are
+# cached by whitespace-normalized raw title
+TITLE_CACHE_SIZE = int(os.environ.get("TITLE_CACHE_SIZE", "10000"))
+pos_tag_cache = LRUCache(maxsize=TITLE_CACHE_SIZE)
+title_cache = LRUCache(maxsize=TITLE_CACHE_SIZE)
+
+def normalize_title(title: str) -> str:
+    return " ".join(title.split())
+
+def build_titles(title_requests: list[GenerateTitleRequest]) -> list[str]:
+    """Build titles for many requests, tagging every uncached over-long title in one pass"""
+    titles = [join_title_parts(request) for request in title_requests]
+
+    untagged = {}  # Normalized title -> indexes waiting on its tags
+    for i, title in enumerate(titles):
+        if len(title) <= MAX_TITLE_LENGTH:
+            continue
+        key = normalize_title(title)
+        brand = title_requests[i].brand
+        cached_title = title_cache.get((key, brand))
+        if cached_title is not None:
+            titles[i] = cached_title
+            continue
+        pos_tags = pos_tag_cache.get(key)
+        if pos_tags is not None:
+            titles[i] = compress_title(pos_tags, brand)
+            title_cache.set((key, brand), titles[i])
+        else:
+            untagged.setdefault(key, []).append(i)
+
+    if untagged:
+        keys = list(untagged)
+        tagged = pos_tag_sents([word_tokenize(key) for key in keys])
+        for key, pos_tags in zip(keys, tagged):
+            pos_tag_cache.set(key, pos_tags)
+            for i in untagged[key]:
+                brand = title_requests[i].brand
+                titles[i] = compress_title(pos_tags, brand)
+                title_cache.set((key, brand), titles[i])
+    return titles
+
+# Description fragments, built once rather than per request
+CONDITION_DESCRIPTIONS = {
+    "new": "Brand new and never used.",
+    "like_new": "In like-new condition with minimal signs of use.",
+    "very_good": "In very good condition with minor wear.",
+    "good": "In good condition with normal signs of use.",
+    "fair": "In fair condition with visible wear.",
+    "poor": "In poor condition and may need repair."
+}
+OPENING_WITH_BRAND = "Discover this amazing {product_name} from {brand}!".format
+OPENING = "Discover this amazing {product_name}!".format
+CATEGORY_LINE = "Perfect for any {category} enthusiast.".format
+CONDITION_LINE = "Condition: {condition}".format
+STYLE_LINE = "\nStyle: {style}".format
+FEATURE_LINE = "• {feature}".format
+FEATURES_HEADING = "\nKey Features:"
+CALL_TO_ACTION = "\nDon't miss out on this amazing piece! Add to cart now."
+
+def render_description(request: GenerateDescriptionRequest) -> str:
+    """Render a listing description from the precompiled templates"""
+    # Opening
+    if request.brand:
+        parts = [OPENING_WITH_BRAND(product_name=request.product_name, brand=request.brand)]
+    else:
+        parts = [OPENING(product_name=request.product_name)]
+
+    # Category
+    if request.category:
+        parts.append(CATEGORY_LINE(category=request.category.lower()))
+
+    # Condition
+    if request.condition:
+        parts.append(
+            CONDITION_DESCRIPTIONS.get(request.condition.lower())
+            or CONDITION_LINE(condition=request.condition)
+        )
+
+    # Features
+    if request.key_features:
+        parts.append(FEATURES_HEADING)
+        parts.extend(FEATURE_LINE(feature=feature) for feature in request.key_features)
+
+    # Style
+    if request.style:
+        parts.append(STYLE_LINE(style=request.style))
+
+    # Call to action
+    parts.append(CALL_TO_ACTION)
+
+    return "\n".join(parts)
+
 @router.post("/generate-title")
 def generate_title(request: GenerateTitleRequest) -> GenerateTitleResponse:
     """Generate an SEO-friendly title for a product listing using NLTK"""
     try:
-        # Collect all relevant parts
-        parts = [request.product_name]
-        if request.brand:
-            parts.insert(0, request.brand)
-        if request.condition:
-            parts.append(request.condition)
-        if request.key_features:
-            # Add up to 2 key features
-            parts.extend(request.key_features[:2])
-        
-        # Join parts and ensure max length
-        title = " | ".join(parts)
-        if len(title) > 80:
-            # Tokenize and keep important words
-            tokens = word_tokenize(title)
-            pos_tags = pos_tag(tokens)
-            
-            # Keep nouns, adjectives, and brand
-            important_words = [word for word, tag in pos_tags 
-                             if tag.startswith(('NN', 'JJ')) 
-                             or (request.brand and word.lower() in request.brand.lower())]
-            
-            title = " ".join(important_words[:8])  # Keep first 8 important words
-        
-        return GenerateTitleResponse(title=title)
+        return GenerateTitleResponse(title=build_titles([request])[0])
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/title-cache-stats")
+def get_title_cache_stats() -> TitleCacheStatsResponse:
+    """Hit rates of the POS tagging and title caches in this worker"""
+    return TitleCacheStatsResponse(
+        pos_tags=CacheStats(**pos_tag_cache.stats()),
+        titles=CacheStats(**title_cache.stats()),
+    )
+
 @router.post("/generate-description")
 def generate_description(request: GenerateDescriptionRequest) -> GenerateDescriptionResponse:
     """Generate a detailed description for a product listing using templates"""
     try:
-        # Build description parts
-        parts = []
-        
-        # Opening
-        if request.brand:
-            parts.append(f"Discover this amazing {request.product_name} from {request.brand}!")
-        else:
-            parts.append(f"Discover this amazing {request.product_name}!")
-        
-        # Category
-        if request.category:
-            parts.append(f"Perfect for any {request.category.lower()} enthusiast.")
-        
-        # Condition
-        if request.condition:
-            condition_desc = {
-                "new": "Brand new and never used.",
-                "like_new": "In like-new condition with minimal signs of use.",
-                "very_good": "In very good condition with minor wear.",
-                "good": "In good condition with normal signs of use.",
-                "fair": "In fair condition with visible wear.",
-                "poor": "In poor condition and may need repair."
-            }.get(request.condition.lower(), f"Condition: {request.condition}")
-            parts.append(condition_desc)
-        
-        # Features
-        if request.key_features:
-            parts.append("\nKey Features:")
-            for feature in request.key_features:
-                parts.append(f"• {feature}")
-        
-        # Style
-        if request.style:
-            parts.append(f"\nStyle: {request.style}")
-        
-        # Call to action
-        parts.append("\nDon't miss out on this amazing piece! Add to cart now.")
-        
-        description = "\n".join(parts)
-        return GenerateDescriptionResponse(description=description)
+        return GenerateDescriptionResponse(description=render_description(request))
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+# Condition results are cached by image URL, and by perceptual hash so that
+# re-hosted or re-encoded copies of a photo reuse the earlier analysis. Plain
+# product shots on white backgrounds have near-identical dHashes, so a hash
+# match also has to agree on a coarse colour layout. The image behind a URL can
+# be replaced, so URL entries expire; hash entries are keyed by content.
+CONDITION_CACHE_SIZE = int(os.environ.get("CONDITION_CACHE_SIZE", "4096"))
+CONDITION_URL_CACHE_TTL = float(os.environ.get("CONDITION_URL_CACHE_TTL", "3600"))
+CONDITION_HASH_MAX_DISTANCE = int(os.environ.get("CONDITION_HASH_MAX_DISTANCE", "2"))
+CONDITION_COLOR_TOLERANCE = int(os.environ.get("CONDITION_COLOR_TOLERANCE", "10"))
+condition_url_cache = LRUCache(maxsize=CONDITION_CACHE_SIZE, ttl=CONDITION_URL_CACHE_TTL)
+condition_hash_cache = PerceptualHashCache(
+    maxsize=CONDITION_CACHE_SIZE, max_distance=CONDITION_HASH_MAX_DISTANCE
+)
+
+def difference_hash(img: np.ndarray) -> int:
+    """64-bit dHash: whether each pixel of a 9x8 thumbnail is brighter than its left neighbour"""
+    small = cv2.resize(img, (9, 8), interpolation=cv2.INTER_AREA)
+    gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+    bits = gray[:, 1:] > gray[:, :-1]
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+def color_signature(img: np.ndarray) -> np.ndarray:
+    """Mean colour of each cell of a 4x4 grid over the image"""
+    return cv2.resize(img, (4, 4), interpolation=cv2.INTER_AREA).astype(np.int16)
+
+def find_similar_condition(image_hash: int, signature: np.ndarray) -> AnalyzeConditionResponse | None:
+    """Look up a cached result for the same or a near-duplicate image"""
+    cached = condition_hash_cache.get(
+        image_hash,
+        accept=lambda entry: np.abs(entry[1] - signature).max() <= CONDITION_COLOR_TOLERANCE,
+    )
+    if cached is None:
+        return None
+    result, _ = cached
+    condition_hash_cache.set(image_hash, (result, signature))
+    return result
+
+def analyze_image_bytes(data: bytes) -> AnalyzeConditionResponse:
+    """Grade the condition of an encoded image"""
+    img = decode_for_analysis(data)
+
+    image_hash = difference_hash(img)
+    signature = color_signature(img)
+    result = find_similar_condition(image_hash, signature)
+    if result is None:
+        with stage_timer("condition_features"):
+            brightness, edge_density, saturation = extract_condition_features(img)
+        result = classify_condition(brightness, edge_density, saturation)
+        condition_hash_cache.set(image_hash, (result, signature))
+    return result
+
+def analyze_image_url(url: str) -> AnalyzeConditionResponse:
+    """Grade the condition of the image at url, reusing earlier results for the same URL"""
+    result = condition_url_cache.get(url)
+    if result is None:
+        result = analyze_image_bytes(download_image(url))
+        condition_url_cache.set(url, result)
+    return result
+
+def iter_condition_batch(image_urls: list[str]):
+    """Yield a result per image as soon as its analysis finishes.
+
+    Images are downloaded concurrently and each one is handed to the
+    analysis pool as soon as its bytes arrive, so decoding overlaps with the
+    remaining downloads.
+    """
+    results: queue.Queue = queue.Queue()
+
+    def on_analyzed(index: int, url: str, future):
+        try:
+            result = future.result()
+            condition_url_cache.set(url, result)
+            results.put(AnalyzeConditionBatchResult(index=index, image_url=url, result=result))
+        except Exception as e:
+            results.put(AnalyzeConditionBatchResult(index=index, image_url=url, error=str(e)))
+
+    def on_downloaded(index: int, url: str, future):
+        try:
+            data = future.result()
+        except Exception as e:
+            results.put(AnalyzeConditionBatchResult(index=index, image_url=url, error=str(e)))
+            return
+        try:
+            analysis = analysis_executor.submit(analyze_image_bytes, data)
+        except Exception as e:
+            # E.g. the pool is shutting down; every image must still get a result
+            results.put(AnalyzeConditionBatchResult(index=index, image_url=url, error=str(e)))
+            return
+        analysis.add_done_callback(lambda f: on_analyzed(index, url, f))
+
+    for index, url in enumerate(image_urls):
+        cached = condition_url_cache.get(url)
+        if cached is not None:
+            results.put(AnalyzeConditionBatchResult(index=index, image_url=url, result=cached))
+            continue
+        try:
+            download = download_executor.submit(download_image, url)
+        except Exception as e:
+            results.put(AnalyzeConditionBatchResult(index=index, image_url=url, error=str(e)))
+            continue
+        download.add_done_callback(lambda f, index=index, url=url: on_downloaded(index, url, f))
+
+    # Whatever hasn't finished by the deadline is reported as timed out, so the stream always ends
+    deadline = time.monotonic() + CONDITION_BATCH_TIMEOUT
+    pending = set(range(len(image_urls)))
+    while pending:
+        try:
+            result = results.get(timeout=max(deadline - time.monotonic(), 0))
+        except queue.Empty:
+            break
+        pending.discard(result.index)
+        yield result
+    for index in sorted(pending):
+        yield AnalyzeConditionBatchResult(
+            index=index, image_url=image_urls[index], error="Timed out"
+        )
+
 @router.post("/analyze-condition")
 def analyze_condition(request: AnalyzeConditionRequest) -> AnalyzeConditionResponse:
     """Analyze product condition from image using OpenCV"""
     try:
-        # Download image
-        response = requests.get(request.image_url)
-        img_array = np.frombuffer(response.content, np.uint8)
-        img = cv2.imdecode(img_array, cv2.IMREAD_COLOR)
-        
-        # Convert to grayscale
-        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-        
-        # Enhanced image analysis
-        brightness = np.mean(gray)
-        
-        # Edge detection for wear and damage
-        edges = cv2.Canny(gray, 100, 200)
-        edge_density = np.sum(edges > 0) / (edges.shape[0] * edges.shape[1])
-        
-        # Color analysis for fading
-        hsv = cv2.cvtColor(img, cv2.COLOR_BGR2HSV)
-        saturation = np.mean(hsv[:,:,1])
-        
-        # Determine condition based on image features
-        if edge_density < 0.05 and brightness > 200 and saturation > 150:
-            condition = "New"
-            details = "Product appears to be in new condition with vibrant colors and minimal texture or wear patterns."
-            confidence = 0.9
-        elif edge_density < 0.1 and brightness > 180 and saturation > 130:
-            condition = "Like New"
-            details = "Product shows very minimal signs of use with good overall appearance and color retention."
-            confidence = 0.85
-        elif edge_density < 0.15 and brightness > 150 and saturation > 110:
-            condition = "Very Good"
-            details = "Product shows some minor wear but maintains good overall condition and coloring."
-            confidence = 0.8
-        elif edge_density < 0.2 and brightness > 120:
-            condition = "Good"
-            details = "Product shows normal signs of wear and use with some color fading."
-            confidence = 0.75
-        elif edge_density < 0.25:
-            condition = "Fair"
-            details = "Product shows significant wear and may have some damage. Colors appear faded."
-            confidence = 0.7
-        else:
-            condition = "Poor"
-            details = "Product shows heavy wear and may need repair. Significant fading and wear patterns visible."
-            confidence = 0.65
-            
-        return AnalyzeConditionResponse(
-            condition=condition,
-            details=details,
-            confidence=confidence
-        )
+        return analyze_image_url(request.image_url)
 
+    except ImageTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/analyze-condition-batch")
+def analyze_condition_batch(request: AnalyzeConditionBatchRequest):
+    """Analyze many product images, streaming one JSON result per line as each completes"""
+    if len(request.image_urls) > MAX_CONDITION_BATCH_SIZE:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {MAX_CONDITION_BATCH_SIZE} images can be analyzed per request"
+        )
+
+    def stream():
+        for result in iter_condition_batch(request.image_urls):
+            yield result.model_dump_json() + "\n"
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+# Bulk listings are generated in chunks so results start streaming before the
+# whole lot is tagged, while each chunk still shares one tagger pass
+MAX_BULK_LISTING_ITEMS = 2000
+BULK_LISTING_CHUNK_SIZE = 200
+
+def iter_bulk_listings(items: list[BulkListingItem]):
+    """Yield a result per item, in order, tagging titles one chunk at a time"""
+    for chunk_start in range(0, len(items), BULK_LISTING_CHUNK_SIZE):
+        chunk = items[chunk_start:chunk_start + BULK_LISTING_CHUNK_SIZE]
+
+        title_indexes = [i for i, item in enumerate(chunk) if item.title is not None]
+        titles = {}
+        title_error = None
+        try:
+            built = build_titles([chunk[i].title for i in title_indexes])
+            titles = dict(zip(title_indexes, built))
+        except Exception as e:
+            title_error = str(e)
+
+        for i, item in enumerate(chunk):
+            result = BulkListingResult(index=chunk_start + i)
+            errors = []
+            if item.title is not None:
+                result.title = titles.get(i)
+                if title_error is not None:
+                    errors.append(title_error)
+            if item.description is not None:
+                try:
+                    result.description = render_description(item.description)
+                except Exception as e:
+                    errors.append(str(e))
+            result.error = "; ".join(errors) or None
+            yield result
+
+@router.post("/generate-listings-bulk")
+def generate_listings_bulk(request: GenerateListingsBulkRequest):
+    """Generate titles and descriptions for many items, streamed as NDJSON in input order"""
+    if len(request.items) > MAX_BULK_LISTING_ITEMS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {MAX_BULK_LISTING_ITEMS} items can be generated per request"
+        )
+
+    def stream():
+        for result in iter_bulk_listings(request.items):
+            yield result.model_dump_json() + "\n"
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
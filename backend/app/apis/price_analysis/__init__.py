@@ -1,11 +1,56 @@
 from typing import List, Optional
-from fastapi import APIRouter
-from pydantic import BaseModel
+from fastapi import APIRouter, HTTPException, Query, Response
+from pydantic import BaseModel, Field
+import base64
+import logging
+import os
+import uuid
 import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
+from pathlib import Path
+from app.auth import AuthorizedUser
+from app.libs.cache_warmer import CacheWarmer, parse_windows
+from app.libs.call_budget import Priority
+from app.libs.fast_json import FastJSONResponse
+from app.libs.synthetic_data import price_history
+from app.libs.watchlist import WatchlistFullError, watchlist_store
+from databutton_app.metrics import stage_timer
+from databutton_app.shared_cache import SHARED_CACHE_LOCAL_TTL, SharedCache, shared_cache
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
+
+MAX_PAGE_SIZE = 500
+
+# Refreshing upstream data for watched keywords in the background
+WARM_ENABLED = os.environ.get("WARM_ENABLED", "1") == "1"
+WARM_INTERVAL = float(os.environ.get("WARM_INTERVAL", "1800"))
+# Outlives WARM_INTERVAL so entries stay warm between rounds and outside the windows
+WARM_CACHE_TTL = float(os.environ.get("WARM_CACHE_TTL", "7200"))
+# Comma separated HH:MM-HH:MM ranges in UTC, empty to warm around the clock
+WARM_WINDOWS = parse_windows(os.environ.get("WARM_WINDOWS", ""))
+WARM_MAX_PER_MINUTE = float(os.environ.get("WARM_MAX_PER_MINUTE", "6"))
+WARM_JITTER = float(os.environ.get("WARM_JITTER", "0.1"))
+
+# How long full history and competitor lists of paginated analyses are kept for
+# fetching later pages, shared so any worker can serve them. They get their
+# own cache file and limits, so large analyses never evict cached searches.
+ANALYSIS_CACHE_TTL = float(os.environ.get("ANALYSIS_CACHE_TTL", "900"))
+ANALYSIS_CACHE_PATH = os.environ.get(
+    "ANALYSIS_CACHE_PATH",
+    str(Path(__file__).resolve().parents[3] / "data" / "analysis_cache.sqlite3"),
+)
+ANALYSIS_CACHE_MAX_ENTRIES = int(os.environ.get("ANALYSIS_CACHE_MAX_ENTRIES", "1000"))
+ANALYSIS_CACHE_MAX_MB = float(os.environ.get("ANALYSIS_CACHE_MAX_MB", "128"))
+
+analysis_cache = SharedCache(
+    ANALYSIS_CACHE_PATH,
+    max_entries=ANALYSIS_CACHE_MAX_ENTRIES,
+    max_bytes=int(ANALYSIS_CACHE_MAX_MB * 1024 * 1024),
+    local_maxsize=64,
+    local_ttl=SHARED_CACHE_LOCAL_TTL,
+)
 
 class PricePoint(BaseModel):
     price: float
@@ -35,6 +80,12 @@ class PriceAnalysisRequest(BaseModel):
     category: Optional[str] = None
     condition: Optional[str] = None
     brand: Optional[str] = None
+    # Return only the first page_size history points and competitors, with cursors for the rest
+    page_size: Optional[int] = Field(None, ge=1, le=MAX_PAGE_SIZE)
+    # Return statistics, trends and timing only, without history or competitors
+    aggregates_only: bool = False
+    # Set by batch repricing, so it gives way to interactive users when eBay calls run low
+    batch: bool = False
     
     @validator('keywords')
     def keywords_not_empty(cls, v):
@@ -57,39 +108,82 @@ class PriceAnalysisResponse(BaseModel):
     active_competitors: List[CompetitorListing]
     best_day_to_list: str  # day of week
     best_time_to_list: str  # time of day
+    # Set when the response is paginated, for fetching further pages
+    analysis_id: Optional[str] = None
+    history_total: Optional[int] = None
+    competitors_total: Optional[int] = None
+    history_cursor: Optional[str] = None
+    competitors_cursor: Optional[str] = None
+
+class WatchRequest(BaseModel):
+    keywords: str
+
+    @validator('keywords')
+    def keywords_not_empty(cls, v):
+        if not v or not v.strip():
+            raise ValueError('keywords cannot be empty')
+        return v.strip()
+
+class WatchlistEntry(BaseModel):
+    id: int
+    keywords: str
+    created_at: float
+
+class PriceHistoryPage(BaseModel):
+    items: List[PricePoint]
+    next_cursor: Optional[str] = None
+
+class CompetitorsPage(BaseModel):
+    items: List[CompetitorListing]
+    next_cursor: Optional[str] = None
+
+def encode_cursor(offset: int) -> str:
+    return base64.urlsafe_b64encode(str(offset).encode()).decode()
+
+def decode_cursor(cursor: Optional[str]) -> int:
+    if not cursor:
+        return 0
+    try:
+        offset = int(base64.urlsafe_b64decode(cursor.encode()))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if offset < 0:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return offset
+
+def paginate(items: list, offset: int, limit: int) -> tuple[list, Optional[str]]:
+    """A page of items starting at offset, and the cursor of the next page if any"""
+    end = offset + limit
+    return items[offset:end], encode_cursor(end) if end < len(items) else None
+
+def get_cached_analysis(analysis_id: str) -> dict:
+    analysis = analysis_cache.get(analysis_id)
+    if analysis is None:
+        raise HTTPException(status_code=404, detail="Analysis not found or expired, analyze again")
+    return analysis
 
 def generate_mock_price_data(base_price: float, num_points: int) -> List[PricePoint]:
     """Generate mock price data for development"""
-    now = datetime.now()
-    platforms = ['eBay', 'Poshmark', 'Mercari']
-    conditions = ['New', 'Like New', 'Good', 'Fair']
-    
-    price_points = []
-    for i in range(num_points):
-        date = now - timedelta(days=i)
-        platform = np.random.choice(platforms)
-        condition = np.random.choice(conditions)
-        # Add some random variation to price
-        price = base_price * (1 + np.random.normal(0, 0.1))
-        # More likely to be sold if price is lower
-        sold = np.random.random() < (1 - price/base_price/1.2)
-        
-        price_points.append(PricePoint(
-            price=round(price, 2),
-            date=date.strftime('%Y-%m-%d'),
-            platform=platform,
-            condition=condition,
-            sold=sold
-        ))
-    
-    return price_points
+    columns = price_history(base_price, num_points)
+    return [
+        PricePoint(price=price, date=date, platform=platform, condition=condition, sold=sold)
+        for price, date, platform, condition, sold in zip(
+            np.round(columns['price'], 2).tolist(),
+            np.datetime_as_string(columns['date']).tolist(),
+            columns['platform'].tolist(),
+            columns['condition'].tolist(),
+            columns['sold'].tolist(),
+        )
+    ]
 
-def get_competitor_listings(keywords: str, condition: Optional[str] = None) -> List[CompetitorListing]:
+def get_competitor_listings(
+    keywords: str, condition: Optional[str] = None, priority: Priority = "interactive"
+) -> List[CompetitorListing]:
     """Get competitor listings from eBay and other sources"""
     from app.apis.ebay_integration import search_ebay_listings
     
     # Get eBay listings
-    ebay_listings = search_ebay_listings(keywords, condition)
+    ebay_listings = search_ebay_listings(keywords, condition, priority=priority)
     
     # Convert to CompetitorListing format
     competitors = [
@@ -150,8 +244,8 @@ def analyze_best_timing(price_points: List[PricePoint]) -> tuple[str, str]:
     
     return best_day, best_time
 
-@router.post("/analyze-price")
-def analyze_price(body: PriceAnalysisRequest) -> PriceAnalysisResponse:
+@router.post("/analyze-price", response_model=PriceAnalysisResponse)
+def analyze_price(body: PriceAnalysisRequest):
     """Analyze market prices and provide recommendations"""
     # For now, generate mock data based on keywords
     # This will be replaced with real data from eBay API and web scraping
@@ -169,18 +263,47 @@ def analyze_price(body: PriceAnalysisRequest) -> PriceAnalysisResponse:
     }
     
     # Calculate market trends
-    market_trends = calculate_market_trends(price_points)
+    with stage_timer("market_trends"):
+        market_trends = calculate_market_trends(price_points)
     
     # Get real competitor listings
-    competitors = get_competitor_listings(body.keywords)
+    with stage_timer("competitor_listings"):
+        competitors = get_competitor_listings(
+            body.keywords, priority="batch" if body.batch else "interactive"
+        )
     
     # Analyze best timing
-    best_day, best_time = analyze_best_timing(price_points)
+    with stage_timer("best_timing"):
+        best_day, best_time = analyze_best_timing(price_points)
     
     # Calculate confidence score based on amount of data
     confidence_score = min(1.0, len(price_points) / 100)
     
-    return PriceAnalysisResponse(
+    price_history = sorted(price_points, key=lambda x: x.date, reverse=True)
+    pagination = {}
+    if body.page_size is not None or body.aggregates_only:
+        analysis_id = uuid.uuid4().hex
+        analysis_cache.set(
+            analysis_id,
+            {
+                "history": [point.model_dump() for point in price_history],
+                "competitors": [listing.model_dump() for listing in competitors],
+            },
+            ttl=ANALYSIS_CACHE_TTL,
+        )
+        page_size = 0 if body.aggregates_only else body.page_size
+        history_page, history_cursor = paginate(price_history, 0, page_size)
+        competitors_page, competitors_cursor = paginate(competitors, 0, page_size)
+        pagination = {
+            "analysis_id": analysis_id,
+            "history_total": len(price_history),
+            "competitors_total": len(competitors),
+            "history_cursor": history_cursor,
+            "competitors_cursor": competitors_cursor,
+        }
+        price_history, competitors = history_page, competitors_page
+
+    return FastJSONResponse(PriceAnalysisResponse(
         suggested_price=round(suggested_price, 2),
         price_range={
             'min': round(price_range['min'], 2),
@@ -188,8 +311,79 @@ def analyze_price(body: PriceAnalysisRequest) -> PriceAnalysisResponse:
         },
         confidence_score=round(confidence_score, 2),
         market_trends=market_trends,
-        price_history=sorted(price_points, key=lambda x: x.date, reverse=True),
+        price_history=price_history,
         active_competitors=competitors,
         best_day_to_list=best_day,
-        best_time_to_list=best_time
-    )
+        best_time_to_list=best_time,
+        **pagination
+    ))
+
+@router.get("/analyze-price/{analysis_id}/history", response_model=PriceHistoryPage)
+def get_price_history_page(
+    analysis_id: str,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+):
+    """Next page of a paginated analysis' price history, newest first"""
+    history = get_cached_analysis(analysis_id)["history"]
+    items, next_cursor = paginate(history, decode_cursor(cursor), limit)
+    return FastJSONResponse(PriceHistoryPage(
+        items=[PricePoint(**point) for point in items], next_cursor=next_cursor
+    ))
+
+@router.get("/analyze-price/{analysis_id}/competitors", response_model=CompetitorsPage)
+def get_competitors_page(
+    analysis_id: str,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+):
+    """Next page of a paginated analysis' competitor listings"""
+    competitors = get_cached_analysis(analysis_id)["competitors"]
+    items, next_cursor = paginate(competitors, decode_cursor(cursor), limit)
+    return FastJSONResponse(CompetitorsPage(
+        items=[CompetitorListing(**listing) for listing in items], next_cursor=next_cursor
+    ))
+
+def warm_watched_keywords(keywords: str):
+    """Refresh the eBay listings an analysis of keywords needs"""
+    from app.apis.ebay_integration import search_ebay_listings
+
+    # Same arguments as get_competitor_listings in analyze_price, so it finds what was stored here
+    search_ebay_listings(keywords, refresh=True, ttl=WARM_CACHE_TTL, priority="warmup")
+
+watchlist_warmer = CacheWarmer(
+    "watchlist",
+    list_keys=watchlist_store.watched_keywords,
+    warm=warm_watched_keywords,
+    interval=WARM_INTERVAL,
+    windows=WARM_WINDOWS,
+    max_per_minute=WARM_MAX_PER_MINUTE,
+    jitter=WARM_JITTER,
+    leases=shared_cache,
+)
+
+@router.on_event("startup")
+def start_watchlist_warmer():
+    """Keep watched keywords warm in the background once the worker starts"""
+    if WARM_ENABLED:
+        watchlist_warmer.start()
+
+@router.get("/watchlist")
+def get_watchlist(user: AuthorizedUser) -> List[WatchlistEntry]:
+    """Keywords the seller watches, kept warm for price analysis"""
+    return [WatchlistEntry(**entry) for entry in watchlist_store.entries(user.sub)]
+
+@router.post("/watchlist")
+def watch_keywords(body: WatchRequest, user: AuthorizedUser) -> WatchlistEntry:
+    """Watch keywords, so their price analyses are served from warm caches"""
+    try:
+        return WatchlistEntry(**watchlist_store.add(user.sub, body.keywords))
+    except WatchlistFullError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.delete("/watchlist/{item_id}", status_code=204)
+def unwatch_keywords(item_id: int, user: AuthorizedUser):
+    """Stop watching keywords"""
+    if not watchlist_store.remove(user.sub, item_id):
+        raise HTTPException(status_code=404, detail="Watchlist entry not found")
+    return Response(status_code=204)
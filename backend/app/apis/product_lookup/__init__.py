@@ -1,15 +1,28 @@
 from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 import requests
 import json
+import hashlib
+import logging
+import os
+import queue
+import tempfile
+import threading
+from concurrent.futures import Future
 from typing import List, Optional
 from PIL import Image
+import numpy as np
 import io
 import base64
+import binascii
 # Image processing imports
 import databutton as db
+from app.libs.fast_json import FastJSONResponse
+from databutton_app.metrics import stage_timer, upstream_call
+from databutton_app.shared_cache import shared_cache
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
 class ProductLookupRequest(BaseModel):
     barcode: str
@@ -34,13 +47,276 @@ class ProcessImageRequest(BaseModel):
 class ProcessImageResponse(BaseModel):
     processed_image: str  # Base64 encoded image
 
+class ImageRendition(BaseModel):
+    name: str
+    max_size: Optional[int] = Field(None, ge=1)  # Longest side in pixels, None keeps full size
+
+# Every image in a batch request is held in memory until the response is sent
+MAX_PROCESS_IMAGES = int(os.environ.get("MAX_PROCESS_IMAGES", "16"))
+
+class ProcessImagesRequest(BaseModel):
+    images: List[str] = Field(..., max_length=MAX_PROCESS_IMAGES)  # Base64 encoded images
+    remove_background: bool = False
+    make_square: bool = True
+    renditions: List[ImageRendition] = [
+        ImageRendition(name="full"),
+        ImageRendition(name="large", max_size=1200),
+        ImageRendition(name="thumbnail", max_size=300),
+    ]
+
+class ProcessedImage(BaseModel):
+    renditions: dict[str, str]  # Rendition name -> base64 encoded image
+    cached: bool = False
+
+class ProcessImagesResponse(BaseModel):
+    images: List[ProcessedImage]
+
+# Barcode lookups are shared by all workers through the shared cache
+BARCODE_CACHE_TTL = float(os.environ.get("BARCODE_CACHE_TTL", "86400"))
+
+# Processed renditions are cached on disk, keyed by input bytes and options
+IMAGE_CACHE_DIR = os.environ.get(
+    "IMAGE_CACHE_DIR", os.path.join(tempfile.gettempdir(), "product-image-cache")
+)
+IMAGE_CACHE_MAX_BYTES = int(os.environ.get("IMAGE_CACHE_MAX_MB", "512")) * 1024 * 1024
+
+class ImageRenditionCache:
+    """Bounded disk cache of processed image renditions.
+
+    Entries are JSON files named by content hash. Reads refresh the file's
+    modification time, and the least recently used files are deleted once the
+    directory grows past max_bytes.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._total_bytes = None
+
+    @staticmethod
+    def make_key(image_bytes: bytes, options: dict) -> str:
+        digest = hashlib.sha256(image_bytes)
+        digest.update(json.dumps(options, sort_keys=True).encode())
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key: str) -> Optional[dict[str, str]]:
+        path = self._path(key)
+        try:
+            with open(path) as f:
+                renditions = json.load(f)
+            os.utime(path)
+            return renditions
+        except (OSError, ValueError):
+            return None
+
+    def set(self, key: str, renditions: dict[str, str]):
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            path = self._path(key)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(renditions, f)
+            size = os.path.getsize(tmp_path)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.error("Error writing image cache entry: %s", e)
+            return
+
+        with self._lock:
+            if self._total_bytes is None:
+                self._total_bytes = self._directory_size()
+            else:
+                self._total_bytes += size
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _entries(self) -> list[os.DirEntry]:
+        try:
+            return [e for e in os.scandir(self.directory) if e.name.endswith(".json")]
+        except OSError:
+            return []
+
+    def _directory_size(self) -> int:
+        return sum(e.stat().st_size for e in self._entries())
+
+    def _evict(self):
+        """Delete least recently used entries down to 90% of the size limit"""
+        entries = sorted(self._entries(), key=lambda e: e.stat().st_mtime)
+        total = sum(e.stat().st_size for e in entries)
+        target = self.max_bytes * 0.9
+        for entry in entries:
+            if total <= target:
+                break
+            try:
+                size = entry.stat().st_size
+                os.remove(entry.path)
+                total -= size
+            except OSError:
+                continue
+        self._total_bytes = total
+
+image_cache = ImageRenditionCache(IMAGE_CACHE_DIR, IMAGE_CACHE_MAX_BYTES)
+
+# Background removal settings, configurable per deployment
+REMBG_MODEL = os.environ.get("REMBG_MODEL", "u2net")
+REMBG_INTRA_OP_THREADS = int(os.environ.get("REMBG_INTRA_OP_THREADS", "2"))
+REMBG_MAX_BATCH_SIZE = int(os.environ.get("REMBG_MAX_BATCH_SIZE", "8"))
+REMBG_BATCH_WAIT_MS = float(os.environ.get("REMBG_BATCH_WAIT_MS", "10"))
+REMBG_WARMUP = os.environ.get("REMBG_WARMUP", "1") == "1"
+
+# Models sharing the U2-Net input normalization and output layout, which lets
+# us stack their inputs into one batched inference call
+U2NET_MODELS = {"u2net", "u2netp", "u2net_human_seg", "silueta"}
+U2NET_MEAN = (0.485, 0.456, 0.406)
+U2NET_STD = (0.229, 0.224, 0.225)
+U2NET_INPUT_SIZE = (320, 320)
+
+class BackgroundRemover:
+    """Remove image backgrounds with a single ONNX session per worker.
+
+    The session is created once and reused. Images submitted concurrently are
+    queued and run through the model together, up to max_batch_size images per
+    inference call.
+    """
+
+    def __init__(self, model_name: str, intra_op_threads: int, max_batch_size: int, batch_wait_ms: float):
+        self.model_name = model_name
+        self.intra_op_threads = intra_op_threads
+        self.max_batch_size = max(1, max_batch_size)
+        self.batch_wait = batch_wait_ms / 1000
+        self._batching_supported = model_name in U2NET_MODELS
+        self._session = None
+        self._session_lock = threading.Lock()
+        self._queue: queue.Queue = queue.Queue()
+        self._worker = None
+        self._worker_lock = threading.Lock()
+
+    def get_session(self):
+        """Create the ONNX session on first use and reuse it afterwards"""
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    import onnxruntime as ort
+                    from rembg import new_session
+
+                    sess_opts = ort.SessionOptions()
+                    sess_opts.intra_op_num_threads = self.intra_op_threads
+                    sess_opts.inter_op_num_threads = 1
+                    sess_opts.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+                    self._session = new_session(self.model_name, sess_opts=sess_opts)
+        return self._session
+
+    def warm_up(self):
+        """Load the model and run one inference so the first request is not slow"""
+        try:
+            self.remove(Image.new("RGBA", U2NET_INPUT_SIZE, (255, 255, 255, 255)))
+            logger.info("Background removal model '%s' warmed up", self.model_name)
+        except Exception as e:
+            logger.error("Background removal warm-up failed: %s", e)
+
+    def remove(self, img: Image.Image) -> Image.Image:
+        """Remove the background of a single image, batching with concurrent callers"""
+        return self.remove_many([img])[0]
+
+    def remove_many(self, images: List[Image.Image]) -> List[Image.Image]:
+        """Remove the background of several images"""
+        self._ensure_worker()
+        futures = []
+        for img in images:
+            future = Future()
+            self._queue.put((img, future))
+            futures.append(future)
+        return [future.result() for future in futures]
+
+    def _ensure_worker(self):
+        if self._worker is None:
+            with self._worker_lock:
+                if self._worker is None:
+                    self._worker = threading.Thread(
+                        target=self._run, name="background-remover", daemon=True
+                    )
+                    self._worker.start()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            # Gather whatever else arrives within the batch window
+            while len(batch) < self.max_batch_size:
+                try:
+                    batch.append(self._queue.get(timeout=self.batch_wait))
+                except queue.Empty:
+                    break
+
+            images = [img for img, _ in batch]
+            try:
+                masks = self._predict_masks(images)
+                cutouts = [
+                    Image.composite(img, Image.new("RGBA", img.size, 0), mask)
+                    for img, mask in zip(images, masks)
+                ]
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            for (_, future), cutout in zip(batch, cutouts):
+                future.set_result(cutout)
+
+    def _predict_masks(self, images: List[Image.Image]) -> List[Image.Image]:
+        session = self.get_session()
+        if not self._batching_supported or len(images) == 1:
+            return [session.predict(img)[0] for img in images]
+
+        input_name = session.inner_session.get_inputs()[0].name
+        batch = np.concatenate([
+            session.normalize(img, U2NET_MEAN, U2NET_STD, U2NET_INPUT_SIZE)[input_name]
+            for img in images
+        ])
+        try:
+            preds = session.inner_session.run(None, {input_name: batch})[0][:, 0, :, :]
+        except Exception as e:
+            # Exported with a fixed batch dimension, run one image at a time from now on
+            logger.warning("Batched background removal not supported by '%s': %s", self.model_name, e)
+            self._batching_supported = False
+            return [session.predict(img)[0] for img in images]
+
+        masks = []
+        for img, pred in zip(images, preds):
+            ma, mi = np.max(pred), np.min(pred)
+            pred = (pred - mi) / max(ma - mi, 1e-6)
+            mask = Image.fromarray((pred.clip(0, 1) * 255).astype("uint8"), mode="L")
+            masks.append(mask.resize(img.size, Image.Resampling.LANCZOS))
+        return masks
+
+background_remover = BackgroundRemover(
+    REMBG_MODEL, REMBG_INTRA_OP_THREADS, REMBG_MAX_BATCH_SIZE, REMBG_BATCH_WAIT_MS
+)
+
+@router.on_event("startup")
+def warm_up_background_remover():
+    """Load the segmentation model in the background once the worker starts"""
+    if REMBG_WARMUP:
+        threading.Thread(
+            target=background_remover.warm_up, name="background-remover-warmup", daemon=True
+        ).start()
+
 def fetch_from_open_food_facts(barcode: str) -> ProductDetails:
-    """Fetch product details from Open Food Facts API"""
+    """Fetch product details from Open Food Facts API, cached across workers"""
+    cache_key = f"barcode:{barcode}"
+    cached = shared_cache.get(cache_key)
+    if cached is not None:
+        return ProductDetails(**cached)
+
     url = f"https://world.openfoodfacts.org/api/v0/product/{barcode}.json"
     
     try:
-        response = requests.get(url)
-        response.raise_for_status()
+        with upstream_call("open_food_facts"):
+            response = requests.get(url)
+            response.raise_for_status()
         data = response.json()
         
         if data.get("status") != 1:
@@ -59,7 +335,7 @@ def fetch_from_open_food_facts(barcode: str) -> ProductDetails:
             if product.get(key):
                 images.append(ProductImage(url=product[key]))
         
-        return ProductDetails(
+        details = ProductDetails(
             name=product.get("product_name", ""),
             brand=product.get("brands"),
             category=product.get("categories"),
@@ -67,42 +343,152 @@ def fetch_from_open_food_facts(barcode: str) -> ProductDetails:
             images=images,
             barcode=barcode
         )
+        shared_cache.set(cache_key, details.model_dump(), ttl=BARCODE_CACHE_TTL)
+        return details
         
     except requests.exceptions.RequestException as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-def process_image(image_data: str, remove_background: bool = False, make_square: bool = True) -> str:
-    """Process an image: make square and optimize for web"""
+class InvalidImageError(ValueError):
+    pass
+
+def decode_image_data(image_data: str) -> bytes:
+    """Decode a base64 image, with or without a data URL prefix"""
     try:
-        # Decode base64 image
-        image_bytes = base64.b64decode(image_data.split(',')[1] if ',' in image_data else image_data)
-        img = Image.open(io.BytesIO(image_bytes))
-        
-        # Convert to RGBA
+        return base64.b64decode(image_data.split(',')[1] if ',' in image_data else image_data)
+    except binascii.Error as e:
+        raise InvalidImageError(f"Invalid base64 image data: {e}") from e
+
+def open_image(image_bytes: bytes) -> Image.Image:
+    """Read the image header only; pixels are decoded by load_rgba"""
+    try:
+        return Image.open(io.BytesIO(image_bytes))
+    except (OSError, Image.DecompressionBombError) as e:
+        raise InvalidImageError(f"Unreadable image: {e}") from e
+
+def load_rgba(img: Image.Image) -> Image.Image:
+    """Decode an opened image into RGBA pixels"""
+    try:
+        img.load()
         if img.mode != 'RGBA':
             img = img.convert('RGBA')
-        
-        # Make square if requested
-        if make_square:
-            size = max(img.size)
-            new_img = Image.new('RGBA', (size, size), (0, 0, 0, 0))
-            paste_x = (size - img.size[0]) // 2
-            paste_y = (size - img.size[1]) // 2
-            new_img.paste(img, (paste_x, paste_y))
-            img = new_img
-        
-        # Optimize size
-        max_size = 1200
-        if max(img.size) > max_size:
-            ratio = max_size / max(img.size)
-            new_size = tuple(int(dim * ratio) for dim in img.size)
-            img = img.resize(new_size, Image.Resampling.LANCZOS)
-        
-        # Convert back to base64
+    except (OSError, Image.DecompressionBombError) as e:
+        raise InvalidImageError(f"Unreadable image: {e}") from e
+    return img
+
+def pad_to_square(img: Image.Image) -> Image.Image:
+    """Center the image on a transparent square canvas"""
+    size = max(img.size)
+    new_img = Image.new('RGBA', (size, size), (0, 0, 0, 0))
+    paste_x = (size - img.size[0]) // 2
+    paste_y = (size - img.size[1]) // 2
+    new_img.paste(img, (paste_x, paste_y))
+    return new_img
+
+def limit_size(img: Image.Image, max_size: Optional[int]) -> Image.Image:
+    """Downscale the image so its longest side is at most max_size"""
+    if max_size is None or max(img.size) <= max_size:
+        return img
+    ratio = max_size / max(img.size)
+    new_size = tuple(max(1, int(dim * ratio)) for dim in img.size)
+    return img.resize(new_size, Image.Resampling.LANCZOS)
+
+def encode_png(img: Image.Image) -> str:
+    """Encode an image as a base64 PNG data URL"""
+    with stage_timer("image_encode"):
         buffer = io.BytesIO()
         img.save(buffer, format='PNG', optimize=True)
         return f"data:image/png;base64,{base64.b64encode(buffer.getvalue()).decode()}"
-        
+
+def render_image(img: Image.Image, renditions: List[ImageRendition], make_square: bool) -> dict[str, str]:
+    """Produce every rendition from one decoded image.
+
+    Renditions are generated largest first, each one downscaled from the
+    previous, so the full resolution image is only resampled once.
+    """
+    if make_square:
+        img = pad_to_square(img)
+
+    rendered = {}
+    source = img
+    ordered = sorted(
+        renditions,
+        key=lambda r: r.max_size if r.max_size is not None else float('inf'),
+        reverse=True,
+    )
+    for rendition in ordered:
+        source = limit_size(source, rendition.max_size)
+        rendered[rendition.name] = encode_png(source)
+    return rendered
+
+def process_images(
+    images: List[str],
+    renditions: List[ImageRendition],
+    remove_background: bool = False,
+    make_square: bool = True,
+) -> List[ProcessedImage]:
+    """Process several images into renditions, reusing cached results.
+
+    Every image is checked up front, but pixels are only decoded when the
+    image is rendered, one at a time or one background removal batch at a
+    time, so a request never holds all of its images decoded at once.
+    Raises InvalidImageError if any image is not valid base64 or readable.
+    """
+    options = {
+        "remove_background": remove_background,
+        "make_square": make_square,
+        "renditions": [r.model_dump() for r in renditions],
+    }
+
+    results: List[Optional[ProcessedImage]] = [None] * len(images)
+    pending = []  # (index, cache key, opened but not yet decoded image)
+    for i, image_data in enumerate(images):
+        try:
+            image_bytes = decode_image_data(image_data)
+            key = image_cache.make_key(image_bytes, options)
+            cached = image_cache.get(key)
+            if cached is not None:
+                results[i] = ProcessedImage(renditions=cached, cached=True)
+            else:
+                pending.append((i, key, open_image(image_bytes)))
+        except InvalidImageError as e:
+            raise InvalidImageError(f"Image {i}: {e}") from e
+
+    # Background removal takes a full inference batch at a time, so those
+    # images are decoded together
+    chunk_size = REMBG_MAX_BATCH_SIZE if remove_background else 1
+    for chunk_start in range(0, len(pending), chunk_size):
+        chunk = pending[chunk_start:chunk_start + chunk_size]
+        decoded = []
+        for i, _, img in chunk:
+            try:
+                decoded.append(load_rgba(img))
+            except InvalidImageError as e:
+                raise InvalidImageError(f"Image {i}: {e}") from e
+        if remove_background:
+            with stage_timer("background_removal"):
+                decoded = background_remover.remove_many(decoded)
+
+        for (i, key, _), img in zip(chunk, decoded):
+            rendered = render_image(img, renditions, make_square)
+            image_cache.set(key, rendered)
+            results[i] = ProcessedImage(renditions=rendered)
+
+    return results
+
+def process_image(image_data: str, remove_background: bool = False, make_square: bool = True) -> str:
+    """Process an image: make square and optimize for web"""
+    try:
+        processed = process_images(
+            [image_data],
+            [ImageRendition(name="processed", max_size=1200)],
+            remove_background=remove_background,
+            make_square=make_square,
+        )
+        return processed[0].renditions["processed"]
+
+    except InvalidImageError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -111,12 +497,33 @@ def lookup_product(request: ProductLookupRequest) -> ProductDetails:
     """Look up product details by barcode"""
     return fetch_from_open_food_facts(request.barcode)
 
-@router.post("/process-image")
-def process_product_image(request: ProcessImageRequest) -> ProcessImageResponse:
+@router.post("/process-image", response_model=ProcessImageResponse)
+def process_product_image(request: ProcessImageRequest):
     """Process a product image: remove background and/or make square"""
     processed_image = process_image(
         request.image_data,
         remove_background=request.remove_background,
         make_square=request.make_square
     )
-    return ProcessImageResponse(processed_image=processed_image)
+    return FastJSONResponse(ProcessImageResponse(processed_image=processed_image))
+
+@router.post("/process-images", response_model=ProcessImagesResponse)
+def process_product_images(request: ProcessImagesRequest):
+    """Process a batch of product images into several renditions each"""
+    if not request.renditions:
+        raise HTTPException(status_code=400, detail="At least one rendition is required")
+    if len({r.name for r in request.renditions}) != len(request.renditions):
+        raise HTTPException(status_code=400, detail="Rendition names must be unique")
+
+    try:
+        images = process_images(
+            request.images,
+            request.renditions,
+            remove_background=request.remove_background,
+            make_square=request.make_square,
+        )
+    except InvalidImageError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return FastJSONResponse(ProcessImagesResponse(images=images))
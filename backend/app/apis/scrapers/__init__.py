@@ -1,5 +1,6 @@
 from fastapi import APIRouter
 from typing import List, Optional
+import logging
 from pydantic import BaseModel
 import re
 import time
@@ -7,8 +8,10 @@ from datetime import datetime
 from bs4 import BeautifulSoup
 import requests
 from urllib.parse import quote_plus
+from databutton_app.metrics import upstream_call
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
 class ScrapedListing(BaseModel):
     title: str
@@ -19,6 +22,8 @@ class ScrapedListing(BaseModel):
     date_listed: Optional[str] = None
 
 class BaseScraper:
+    upstream: str  # Label for the upstream call metrics
+
     def __init__(self):
         self.session = requests.Session()
         self.session.headers.update({
@@ -38,8 +43,9 @@ class BaseScraper:
     def _get(self, url: str) -> str:
         """Make a GET request with rate limiting"""
         self._wait()
-        response = self.session.get(url)
-        response.raise_for_status()
+        with upstream_call(self.upstream):
+            response = self.session.get(url)
+            response.raise_for_status()
         return response.text
 
     def search(self, keywords: str) -> List[ScrapedListing]:
@@ -47,6 +53,8 @@ class BaseScraper:
         raise NotImplementedError
 
 class PoshmarkScraper(BaseScraper):
+    upstream = "poshmark"
+
     def __init__(self):
         super().__init__()
         self.base_url = "https://poshmark.com"
@@ -87,15 +95,17 @@ class PoshmarkScraper(BaseScraper):
                         date_listed=datetime.now().strftime('%Y-%m-%d')  # Approximate
                     ))
                 except Exception as e:
-                    print(f"Error parsing Poshmark listing: {e}")
+                    logger.warning("Error parsing Poshmark listing: %s", e)
                     continue
 
             return listings
         except Exception as e:
-            print(f"Error scraping Poshmark: {e}")
+            logger.error("Error scraping Poshmark: %s", e)
             return []
 
 class MercariScraper(BaseScraper):
+    upstream = "mercari"
+
     def __init__(self):
         super().__init__()
         self.base_url = "https://www.mercari.com"
@@ -139,12 +149,12 @@ class MercariScraper(BaseScraper):
                         date_listed=datetime.now().strftime('%Y-%m-%d')  # Approximate
                     ))
                 except Exception as e:
-                    print(f"Error parsing Mercari listing: {e}")
+                    logger.warning("Error parsing Mercari listing: %s", e)
                     continue
 
             return listings
         except Exception as e:
-            print(f"Error scraping Mercari: {e}")
+            logger.error("Error scraping Mercari: %s", e)
             return []
 
 def get_scraped_listings(keywords: str) -> List[ScrapedListing]:
@@ -160,7 +170,7 @@ def get_scraped_listings(keywords: str) -> List[ScrapedListing]:
             listings = scraper.search(keywords)
             all_listings.extend(listings)
         except Exception as e:
-            print(f"Error with {scraper.__class__.__name__}: {e}")
+            logger.error("Error with %s: %s", scraper.__class__.__name__, e)
             continue
     
     return all_listings
\ No newline at end of file
@@ -0,0 +1,170 @@
+"""Background refresh of cached upstream data, paced and kept to off-peak hours.
+
+A CacheWarmer thread periodically asks for the keys worth keeping warm
+(e.g. watched keywords) and calls a warm function for every key that is
+due. Keys are refreshed once per interval, randomly stretched or shrunk by
+jitter so refreshes spread out instead of all expiring together. Warming
+only runs inside the configured UTC windows, and at most max_per_minute
+keys are warmed per minute so upstream rate limits are left to users.
+
+With a SharedCache for leases, only one worker on the host warms a given
+key per interval; the others skip it.
+
+Usage:
+
+    from app.libs.cache_warmer import CacheWarmer, parse_windows
+
+    warmer = CacheWarmer(
+        "prices",
+        list_keys=watchlist_store.watched_keywords,
+        warm=refresh_prices,
+        interval=1800,
+        windows=parse_windows("01:00-06:00"),
+        max_per_minute=10,
+        leases=shared_cache,
+    )
+    warmer.start()
+"""
+
+import hashlib
+import logging
+import os
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Callable
+
+from databutton_app.metrics import registry
+from databutton_app.shared_cache import SharedCache
+
+logger = logging.getLogger(__name__)
+
+cache_warms = registry.counter(
+    "cache_warm_total", "Keys handled by cache warmers by outcome", ("warmer", "outcome")
+)
+
+
+def parse_windows(spec: str) -> list[tuple[int, int]]:
+    """Parse "HH:MM-HH:MM,..." into (start, end) minutes after midnight.
+
+    A window may wrap around midnight, e.g. "22:00-04:00". An empty spec
+    means no restriction.
+    """
+    windows = []
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        try:
+            start, end = (
+                int(hours) * 60 + int(minutes)
+                for hours, minutes in (bound.strip().split(":") for bound in part.split("-"))
+            )
+        except ValueError:
+            raise ValueError(f"Invalid time window {part!r}, expected HH:MM-HH:MM")
+        windows.append((start, end))
+    return windows
+
+
+def in_windows(windows: list[tuple[int, int]], moment: datetime | None = None) -> bool:
+    """Whether moment (default now, in UTC) falls in any window; always true without windows"""
+    if not windows:
+        return True
+    moment = moment or datetime.now(timezone.utc)
+    minute = moment.hour * 60 + moment.minute
+    return any(
+        start <= minute < end if start <= end else minute >= start or minute < end
+        for start, end in windows
+    )
+
+
+class CacheWarmer:
+    def __init__(
+        self,
+        name: str,
+        list_keys: Callable[[], list[str]],
+        warm: Callable[[str], None],
+        interval: float,
+        windows: list[tuple[int, int]] | None = None,
+        max_per_minute: float = 10,
+        jitter: float = 0.1,
+        leases: SharedCache | None = None,
+        poll_interval: float = 60,
+    ):
+        self.name = name
+        self.list_keys = list_keys
+        self.warm = warm
+        self.interval = interval
+        self.windows = windows or []
+        self.max_per_minute = max_per_minute
+        self.jitter = jitter
+        self.leases = leases
+        self.poll_interval = poll_interval
+
+        # key -> time.monotonic() at which it should be warmed again
+        self._next_due: dict[str, float] = {}
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._thread_lock = threading.Lock()
+
+    def _jittered(self, seconds: float) -> float:
+        return seconds * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def _acquire_lease(self, key: str) -> bool:
+        if self.leases is None:
+            return True
+        lease_key = f"warm:{self.name}:" + hashlib.sha256(key.encode()).hexdigest()
+        # Expires a bit before the next round, so a worker that restarted can take over
+        return self.leases.add(lease_key, os.getpid(), ttl=self.interval * (1 - self.jitter))
+
+    def run_once(self) -> int:
+        """Warm every due key, pacing calls; returns how many were warmed"""
+        keys = self.list_keys()
+        now = time.monotonic()
+        self._next_due = {key: self._next_due.get(key, now) for key in keys}
+        warmed = 0
+        for key in keys:
+            if self._stop.is_set() or not in_windows(self.windows):
+                break
+            if self._next_due[key] > time.monotonic():
+                continue
+            self._next_due[key] = time.monotonic() + self._jittered(self.interval)
+            if not self._acquire_lease(key):
+                cache_warms.inc(self.name, "skipped")
+                continue
+            try:
+                self.warm(key)
+            except Exception:
+                logger.exception("Warming %s for %r failed", self.name, key)
+                cache_warms.inc(self.name, "failed")
+            else:
+                cache_warms.inc(self.name, "warmed")
+                warmed += 1
+            # Stay within the budget for this warmer
+            self._stop.wait(self._jittered(60 / self.max_per_minute))
+        return warmed
+
+    def _run(self):
+        # Workers started together should not all poll at the same moment
+        self._stop.wait(random.uniform(0, self.poll_interval))
+        while not self._stop.is_set():
+            if in_windows(self.windows):
+                try:
+                    self.run_once()
+                except Exception:
+                    logger.exception("Cache warmer %s failed", self.name)
+            self._stop.wait(self._jittered(self.poll_interval))
+
+    def start(self):
+        with self._thread_lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run, name=f"cache-warmer-{self.name}", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
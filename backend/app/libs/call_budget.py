@@ -0,0 +1,166 @@
+"""Shared call budgets for upstreams with a quota, giving users priority.
+
+Quotas such as eBay's daily Browse API limit apply to the whole
+application, so every worker draws from one counter kept in SQLite. Each
+caller states a priority: interactive calls may use the whole budget, while
+batch and warm-up calls stop once only their reserve is left, so users are
+never starved by background work. Callers that have cached data to fall
+back on give up a little earlier still, keeping the last calls for those
+that don't.
+
+Usage:
+
+    from app.libs.call_budget import CallBudget
+
+    budget = CallBudget("ebay_search", limit=5000, window=86400)
+
+    if budget.try_acquire("batch", fallback=cached is not None):
+        fetch()
+    else:
+        serve(cached)
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Literal
+
+from databutton_app.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+BUDGET_DB_PATH = os.environ.get(
+    "BUDGET_DB_PATH",
+    str(Path(__file__).resolve().parents[2] / "data" / "call_budgets.sqlite3"),
+)
+
+Priority = Literal["interactive", "batch", "warmup"]
+
+# Share of the budget each priority has to leave for higher ones
+DEFAULT_RESERVES: dict[str, float] = {"interactive": 0.0, "batch": 0.2, "warmup": 0.5}
+# Additional share left by callers that can fall back to cached data
+DEFAULT_FALLBACK_RESERVE = 0.1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS budgets (
+    name TEXT PRIMARY KEY,
+    window_start REAL NOT NULL,
+    used INTEGER NOT NULL
+);
+"""
+
+budget_limit = registry.gauge(
+    "upstream_budget_limit", "Calls allowed per budget window", ("upstream",)
+)
+budget_remaining = registry.gauge(
+    "upstream_budget_remaining", "Calls left in the current budget window", ("upstream",)
+)
+budget_decisions = registry.counter(
+    "upstream_budget_decisions_total",
+    "Calls allowed or denied by upstream budgets",
+    ("upstream", "priority", "decision"),
+)
+
+
+class CallBudget:
+    """At most limit calls per window of seconds, counted across workers.
+
+    Windows are aligned to the epoch, so a daily budget resets at midnight UTC.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        limit: int,
+        window: float = 86400,
+        reserves: dict[str, float] | None = None,
+        fallback_reserve: float = DEFAULT_FALLBACK_RESERVE,
+        path: str = BUDGET_DB_PATH,
+    ):
+        self.name = name
+        self.limit = limit
+        self.window = window
+        self.reserves = reserves or DEFAULT_RESERVES
+        self.fallback_reserve = fallback_reserve
+        self.path = path
+        self._local = threading.local()
+        budget_limit.set(limit, name)
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            if self.path != ":memory:":
+                Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, isolation_level=None, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def _window_start(self) -> float:
+        now = time.time()
+        return now - now % self.window
+
+    def _update(self, spend) -> int:
+        """Apply spend(used) -> new used to the current window atomically, return new used"""
+        window_start = self._window_start()
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT window_start, used FROM budgets WHERE name = ?", (self.name,)
+            ).fetchone()
+            used = row[1] if row is not None and row[0] == window_start else 0
+            new_used = spend(used)
+            if row is None or new_used != row[1] or row[0] != window_start:
+                conn.execute(
+                    "INSERT OR REPLACE INTO budgets (name, window_start, used) VALUES (?, ?, ?)",
+                    (self.name, window_start, new_used),
+                )
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        budget_remaining.set(self.limit - new_used, self.name)
+        return new_used
+
+    def try_acquire(self, priority: Priority = "interactive", cost: int = 1, fallback: bool = False) -> bool:
+        """Take cost calls from the budget if priority may still spend them.
+
+        Pass fallback when cached data can be served instead, so the caller
+        gives way before callers that have nothing to fall back on.
+        """
+        reserve = self.reserves.get(priority, 0.0) + (self.fallback_reserve if fallback else 0.0)
+        allowed = self.limit * (1 - min(reserve, 1.0))
+        granted = False
+
+        def spend(used: int) -> int:
+            nonlocal granted
+            granted = used + cost <= allowed
+            return used + cost if granted else used
+
+        try:
+            self._update(spend)
+        except sqlite3.Error as e:
+            # Accounting problems shouldn't take the upstream away from users
+            logger.warning("Call budget %s unavailable, allowing call: %s", self.name, e)
+            granted = True
+        budget_decisions.inc(self.name, priority, "allowed" if granted else "denied")
+        return granted
+
+    def exhaust(self):
+        """Use up the rest of the window, e.g. after the upstream reported its quota as spent"""
+        try:
+            self._update(lambda used: max(used, self.limit))
+        except sqlite3.Error as e:
+            logger.warning("Call budget %s unavailable: %s", self.name, e)
+
+    def remaining(self) -> int:
+        try:
+            return self.limit - self._update(lambda used: used)
+        except sqlite3.Error as e:
+            logger.warning("Call budget %s unavailable: %s", self.name, e)
+            return self.limit
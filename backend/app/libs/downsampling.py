@@ -0,0 +1,53 @@
+"""Shape-preserving downsampling of time series for charts.
+
+Usage:
+
+    from app.libs.downsampling import lttb_indices
+
+    keep = lttb_indices(values, 200)
+    points = [points[i] for i in keep]
+"""
+
+import numpy as np
+
+
+def lttb_indices(values, threshold: int) -> list[int]:
+    """Indices of the points kept by Largest-Triangle-Three-Buckets.
+
+    Points are taken to be evenly spaced. The first and last points are
+    always kept. From each of threshold - 2 buckets in between, the point
+    forming the largest triangle with the previously kept point and the
+    average of the next bucket is kept, which preserves peaks and dips a
+    plain stride would skip.
+    """
+    y = np.asarray(values, dtype=float)
+    n = len(y)
+    if threshold >= n:
+        return list(range(n))
+    if threshold < 3:
+        return [0, n - 1][:max(threshold, 0)]
+
+    x = np.arange(n, dtype=float)
+    # Bucket boundaries over the points between the first and the last
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+
+    kept = [0]
+    previous = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            next_start, next_end = edges[i + 1], edges[i + 2]
+            next_x = x[next_start:next_end].mean()
+            next_y = y[next_start:next_end].mean()
+        else:
+            next_x, next_y = x[n - 1], y[n - 1]
+
+        # Twice the triangle areas, which ranks them the same
+        areas = np.abs(
+            (x[previous] - next_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (next_y - y[previous])
+        )
+        previous = start + int(areas.argmax())
+        kept.append(previous)
+    kept.append(n - 1)
+    return kept
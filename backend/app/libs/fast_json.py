@@ -0,0 +1,39 @@
+"""JSON response that serializes already built models without revalidating them.
+
+When an endpoint returns a pydantic model, FastAPI dumps it to a dict,
+validates that dict against the response model again and then encodes it.
+Returning FastJSONResponse skips all of that: models are serialized once
+by pydantic's own serializer, which is faster for models than dumping them
+to a dict for another encoder. Other content goes through the standard
+library. Keep response_model on the route decorator so the OpenAPI schema
+is unchanged.
+
+Usage:
+
+    from app.libs.fast_json import FastJSONResponse
+
+    @router.post("/analyze-price", response_model=PriceAnalysisResponse)
+    def analyze_price(body: PriceAnalysisRequest):
+        return FastJSONResponse(PriceAnalysisResponse(...))
+"""
+
+import json
+from typing import Any
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+
+def dumps(content: Any) -> bytes:
+    """Serialize a pydantic model, or any JSON-compatible content, to compact JSON"""
+    if isinstance(content, BaseModel):
+        return content.model_dump_json().encode()
+    return json.dumps(
+        jsonable_encoder(content), ensure_ascii=False, separators=(",", ":")
+    ).encode()
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
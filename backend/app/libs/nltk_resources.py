@@ -0,0 +1,141 @@
+"""Local NLTK data provisioning and lazy loading.
+
+NLTK data is downloaded once, ahead of time, into a local data directory:
+
+    python -m app.libs.nltk_resources
+
+At startup verify_nltk_resources() only looks in that directory and never
+touches the network. nltk itself is imported on the first call to
+word_tokenize or one of the tagging functions, so importing an API module
+stays cheap.
+"""
+
+import logging
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+NLTK_DATA_DIR = os.environ.get(
+    "NLTK_DATA_DIR", str(Path(__file__).resolve().parents[2] / "nltk_data")
+)
+
+# Each group is satisfied by any one of its packages. Newer NLTK releases
+# read punkt_tab and averaged_perceptron_tagger_eng, older ones the originals.
+NLTK_RESOURCE_GROUPS = {
+    "tokenizer": [("punkt_tab", "tokenizers/punkt_tab"), ("punkt", "tokenizers/punkt")],
+    "tagger": [
+        ("averaged_perceptron_tagger_eng", "taggers/averaged_perceptron_tagger_eng"),
+        ("averaged_perceptron_tagger", "taggers/averaged_perceptron_tagger"),
+    ],
+    "stopwords": [("stopwords", "corpora/stopwords")],
+}
+
+_load_lock = threading.Lock()
+_word_tokenize = None
+_tagger = None
+
+def _use_local_data_dir():
+    import nltk
+
+    if NLTK_DATA_DIR not in nltk.data.path:
+        nltk.data.path.insert(0, NLTK_DATA_DIR)
+
+
+def provision_nltk_resources() -> bool:
+    """Download every resource group into NLTK_DATA_DIR. Needs network access."""
+    import nltk
+
+    os.makedirs(NLTK_DATA_DIR, exist_ok=True)
+    _use_local_data_dir()
+
+    ok = True
+    for group, packages in NLTK_RESOURCE_GROUPS.items():
+        downloaded = [
+            package
+            for package, _ in packages
+            if nltk.download(package, download_dir=NLTK_DATA_DIR, quiet=True)
+        ]
+        if not downloaded:
+            logger.error("Failed to download NLTK %s data", group)
+            ok = False
+    return ok
+
+
+def missing_nltk_resources() -> list[str]:
+    """Names of resource groups not present in NLTK_DATA_DIR.
+
+    Checks the files directly rather than through nltk.data.find, so startup
+    does not pay for importing nltk.
+    """
+    missing = []
+    for group, packages in NLTK_RESOURCE_GROUPS.items():
+        if not any(
+            os.path.exists(os.path.join(NLTK_DATA_DIR, resource_path))
+            or os.path.exists(os.path.join(NLTK_DATA_DIR, f"{resource_path}.zip"))
+            for _, resource_path in packages
+        ):
+            missing.append(group)
+    return missing
+
+
+def verify_nltk_resources() -> bool:
+    """Check the local NLTK data at startup, without network access"""
+    start = time.perf_counter()
+    missing = missing_nltk_resources()
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    if missing:
+        logger.warning(
+            "Missing NLTK data (%s) in %s, run `python -m app.libs.nltk_resources` to provision it",
+            ", ".join(missing), NLTK_DATA_DIR,
+        )
+        return False
+    logger.info("NLTK data verified in %.1fms", elapsed_ms)
+    return True
+
+
+def _load():
+    global _word_tokenize, _tagger
+    with _load_lock:
+        if _tagger is None:
+            _use_local_data_dir()
+            from nltk.tag.perceptron import PerceptronTagger
+            from nltk.tokenize import word_tokenize
+
+            _word_tokenize = word_tokenize
+            # nltk.pos_tag builds a new tagger, reloading the model, on every
+            # call. One shared instance is loaded once and reused instead.
+            _tagger = PerceptronTagger()
+
+
+def word_tokenize(text: str) -> list[str]:
+    if _word_tokenize is None:
+        _load()
+    return _word_tokenize(text)
+
+
+def pos_tag(tokens: list[str]) -> list[tuple[str, str]]:
+    if _tagger is None:
+        _load()
+    return _tagger.tag(tokens)
+
+
+def pos_tag_sents(sentences: list[list[str]]) -> list[list[tuple[str, str]]]:
+    """Tag many token lists in one pass over the shared tagger"""
+    if _tagger is None:
+        _load()
+    return _tagger.tag_sents(sentences)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    start = time.perf_counter()
+    ok = provision_nltk_resources()
+    logger.info(
+        "NLTK data provisioned in %s in %.1fs", NLTK_DATA_DIR, time.perf_counter() - start
+    )
+    sys.exit(0 if ok and not missing_nltk_resources() else 1)
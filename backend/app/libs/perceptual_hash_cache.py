@@ -0,0 +1,101 @@
+"""Thread-safe bounded LRU cache keyed by 64-bit perceptual hashes.
+
+Lookups also find entries whose hash is within max_distance bits of the
+requested one, without scanning the cache. Usage:
+
+    from app.libs.perceptual_hash_cache import PerceptualHashCache
+
+    cache = PerceptualHashCache(maxsize=4096, max_distance=2)
+    cache.set(image_hash, value)
+    value = cache.get(image_hash, accept=lambda value: ...)
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Callable
+
+HASH_BITS = 64
+
+
+class PerceptualHashCache:
+    """Bounded mapping from perceptual hash to value with near-duplicate lookup.
+
+    Hashes are split into max_distance + 1 bands. Two hashes that differ in
+    at most max_distance bits must agree exactly on at least one band, so
+    only entries sharing a band with the requested hash are compared.
+    """
+
+    def __init__(self, maxsize: int, max_distance: int = 0):
+        self.maxsize = maxsize
+        self.max_distance = max(0, min(max_distance, HASH_BITS - 1))
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict[int, Any] = OrderedDict()
+        bands = self.max_distance + 1
+        edges = [HASH_BITS * i // bands for i in range(bands + 1)]
+        self._bands = [(start, (1 << (end - start)) - 1) for start, end in zip(edges, edges[1:])]
+        # One index per band: band value -> hashes with that value
+        self._index: list[dict[int, set[int]]] = [{} for _ in self._bands]
+        self._lock = threading.Lock()
+
+    def get(self, image_hash: int, accept: Callable[[Any], bool] | None = None, default: Any = None) -> Any:
+        """Value of the closest hash within max_distance that accept allows.
+
+        accept is a secondary check on each candidate's value, for hashes
+        that collide on different images.
+        """
+        with self._lock:
+            candidates = set()
+            for (shift, mask), index in zip(self._bands, self._index):
+                candidates |= index.get((image_hash >> shift) & mask, set())
+
+            best = None
+            best_distance = self.max_distance + 1
+            for cached_hash in candidates:
+                distance = (cached_hash ^ image_hash).bit_count()
+                if distance < best_distance and (accept is None or accept(self._data[cached_hash])):
+                    best, best_distance = cached_hash, distance
+            if best is None:
+                self.misses += 1
+                return default
+            self._data.move_to_end(best)
+            self.hits += 1
+            return self._data[best]
+
+    def set(self, image_hash: int, value: Any):
+        with self._lock:
+            if image_hash not in self._data:
+                for (shift, mask), index in zip(self._bands, self._index):
+                    index.setdefault((image_hash >> shift) & mask, set()).add(image_hash)
+            self._data[image_hash] = value
+            self._data.move_to_end(image_hash)
+            while len(self._data) > self.maxsize:
+                evicted, _ = self._data.popitem(last=False)
+                self._unindex(evicted)
+
+    def _unindex(self, image_hash: int):
+        for (shift, mask), index in zip(self._bands, self._index):
+            band = (image_hash >> shift) & mask
+            hashes = index[band]
+            hashes.discard(image_hash)
+            if not hashes:
+                del index[band]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            for index in self._index:
+                index.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
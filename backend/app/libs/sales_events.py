@@ -0,0 +1,438 @@
+"""Embedded store of sales and listing events with pre-aggregated rollups.
+
+Events are appended to a SQLite database. The same transaction that stores
+them also updates:
+
+- daily_rollups: sales, revenue and new listings per day, platform and category
+- monthly_rollups: the same per month, for charts over long ranges
+- totals: the same figures per platform and category over all time
+- inventory: item counts by status and time-to-sell per seller
+- data_versions: a counter per seller bumped by every ingest, for caching
+
+Summaries read only these tables, so their cost depends on the number of
+platforms, categories and days asked for, not on how many events a seller has.
+
+Usage:
+
+    from app.libs.sales_events import sales_event_store
+
+    sales_event_store.ingest(user.sub, events)
+    platforms = sales_event_store.platform_totals(user.sub)
+"""
+
+import itertools
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Iterable, Iterator
+
+ANALYTICS_DB_PATH = os.environ.get(
+    "ANALYTICS_DB_PATH",
+    str(Path(__file__).resolve().parents[2] / "data" / "sales_events.sqlite3"),
+)
+
+EVENT_TYPES = ("listed", "sold", "delisted")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    event_type TEXT NOT NULL,
+    platform TEXT NOT NULL,
+    category TEXT NOT NULL,
+    item_id TEXT NOT NULL,
+    price REAL NOT NULL,
+    cost REAL,
+    occurred_at REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS daily_rollups (
+    user_id TEXT NOT NULL,
+    day TEXT NOT NULL,
+    platform TEXT NOT NULL,
+    category TEXT NOT NULL,
+    sales INTEGER NOT NULL,
+    revenue REAL NOT NULL,
+    cost REAL NOT NULL,
+    costed_revenue REAL NOT NULL,
+    listings INTEGER NOT NULL,
+    PRIMARY KEY (user_id, day, platform, category)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS monthly_rollups (
+    user_id TEXT NOT NULL,
+    month TEXT NOT NULL,
+    platform TEXT NOT NULL,
+    category TEXT NOT NULL,
+    sales INTEGER NOT NULL,
+    revenue REAL NOT NULL,
+    cost REAL NOT NULL,
+    costed_revenue REAL NOT NULL,
+    listings INTEGER NOT NULL,
+    PRIMARY KEY (user_id, month, platform, category)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS totals (
+    user_id TEXT NOT NULL,
+    platform TEXT NOT NULL,
+    category TEXT NOT NULL,
+    sales INTEGER NOT NULL,
+    revenue REAL NOT NULL,
+    cost REAL NOT NULL,
+    costed_revenue REAL NOT NULL,
+    listings INTEGER NOT NULL,
+    PRIMARY KEY (user_id, platform, category)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS items (
+    user_id TEXT NOT NULL,
+    item_id TEXT NOT NULL,
+    status TEXT NOT NULL,
+    listed_at REAL,
+    sold_at REAL,
+    PRIMARY KEY (user_id, item_id)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS inventory (
+    user_id TEXT PRIMARY KEY,
+    total_items INTEGER NOT NULL DEFAULT 0,
+    active INTEGER NOT NULL DEFAULT 0,
+    sold INTEGER NOT NULL DEFAULT 0,
+    days_to_sell_total REAL NOT NULL DEFAULT 0,
+    days_to_sell_count INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS data_versions (
+    user_id TEXT PRIMARY KEY,
+    version INTEGER NOT NULL
+);
+
+CREATE TRIGGER IF NOT EXISTS item_added AFTER INSERT ON items BEGIN
+    UPDATE inventory SET
+        total_items = total_items + 1,
+        active = active + (NEW.status = 'active'),
+        sold = sold + (NEW.status = 'sold')
+    WHERE user_id = NEW.user_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS item_status_changed AFTER UPDATE OF status ON items
+WHEN OLD.status != NEW.status BEGIN
+    UPDATE inventory SET
+        active = active - (OLD.status = 'active') + (NEW.status = 'active'),
+        sold = sold - (OLD.status = 'sold') + (NEW.status = 'sold'),
+        days_to_sell_total = days_to_sell_total + CASE
+            WHEN NEW.status = 'sold' AND NEW.listed_at IS NOT NULL
+            THEN (NEW.sold_at - NEW.listed_at) / 86400.0 ELSE 0 END,
+        days_to_sell_count = days_to_sell_count
+            + (NEW.status = 'sold' AND NEW.listed_at IS NOT NULL)
+    WHERE user_id = NEW.user_id;
+END;
+"""
+
+RESOLUTIONS = ("day", "week", "month")
+
+# Bucket start of a day column; weeks start on Monday
+WEEK_START = "date(day, '-' || ((CAST(strftime('%w', day) AS INTEGER) + 6) % 7) || ' days')"
+
+ROLLUP_COLUMNS = "sales, revenue, cost, costed_revenue, listings"
+ROLLUP_UPDATE = """
+    sales = sales + excluded.sales,
+    revenue = revenue + excluded.revenue,
+    cost = cost + excluded.cost,
+    costed_revenue = costed_revenue + excluded.costed_revenue,
+    listings = listings + excluded.listings
+"""
+
+# Item status changes, one statement per event type
+ITEM_STATEMENTS = {
+    # A new listing, or a relisting of a delisted item
+    "listed": """
+        INSERT INTO items (user_id, item_id, status, listed_at)
+        VALUES (:user_id, :item_id, 'active', :occurred_at)
+        ON CONFLICT (user_id, item_id) DO UPDATE SET
+            status = 'active', listed_at = excluded.listed_at, sold_at = NULL
+        WHERE items.status = 'delisted'
+    """,
+    # Sales of items never seen listed still count, without a time to sell
+    "sold": """
+        INSERT INTO items (user_id, item_id, status, sold_at)
+        VALUES (:user_id, :item_id, 'sold', :occurred_at)
+        ON CONFLICT (user_id, item_id) DO UPDATE SET
+            status = 'sold', sold_at = excluded.sold_at
+        WHERE items.status != 'sold'
+    """,
+    "delisted": """
+        UPDATE items SET status = 'delisted'
+        WHERE user_id = :user_id AND item_id = :item_id AND status = 'active'
+    """,
+}
+
+
+def to_timestamp(value: datetime) -> float:
+    """Unix timestamp of value, reading naive datetimes as UTC"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+class SalesEventStore:
+    """Event store backed by one SQLite database, safe to share between threads.
+
+    Each thread gets its own connection. Writes are serialized by a lock,
+    reads run concurrently thanks to WAL mode.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        self._schema_lock = threading.Lock()
+        self._schema_ready = False
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            if self.path != ":memory:":
+                Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, isolation_level=None, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with self._schema_lock:
+                if not self._schema_ready:
+                    conn.executescript(SCHEMA)
+                    self._schema_ready = True
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self, immediate: bool = False) -> Iterator[sqlite3.Connection]:
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def ingest(self, user_id: str, events: Iterable) -> int:
+        """Store events and fold them into the rollups, all in one transaction.
+
+        Events need event_type, platform, category, item_id, price, cost
+        (or None) and occurred_at (a datetime) attributes. Returns the
+        number of events stored.
+        """
+        rows = sorted(
+            (
+                (
+                    user_id,
+                    event.event_type,
+                    event.platform,
+                    event.category,
+                    event.item_id,
+                    float(event.price),
+                    None if event.cost is None else float(event.cost),
+                    to_timestamp(event.occurred_at),
+                )
+                for event in events
+            ),
+            key=lambda row: row[7],
+        )
+        if not rows:
+            return 0
+        for row in rows:
+            if row[1] not in EVENT_TYPES:
+                raise ValueError(f"Unknown event type: {row[1]}")
+
+        daily: dict[tuple[str, str, str], list] = {}
+        days: dict[int, str] = {}
+        for _, event_type, platform, category, _, price, cost, occurred_at in rows:
+            day_number = int(occurred_at // 86400)
+            day = days.get(day_number)
+            if day is None:
+                day = days[day_number] = time.strftime(
+                    "%Y-%m-%d", time.gmtime(day_number * 86400)
+                )
+            rollup = daily.get((day, platform, category))
+            if rollup is None:
+                rollup = daily[(day, platform, category)] = [0, 0.0, 0.0, 0.0, 0]
+            if event_type == "sold":
+                rollup[0] += 1
+                rollup[1] += price
+                if cost is not None:
+                    rollup[2] += cost
+                    rollup[3] += price
+            elif event_type == "listed":
+                rollup[4] += 1
+
+        monthly: dict[tuple[str, str, str], list] = {}
+        totals: dict[tuple[str, str], list] = {}
+        for (day, platform, category), rollup in daily.items():
+            month = monthly.setdefault(
+                (day[:7] + "-01", platform, category), [0, 0.0, 0.0, 0.0, 0]
+            )
+            total = totals.setdefault((platform, category), [0, 0.0, 0.0, 0.0, 0])
+            for i, value in enumerate(rollup):
+                month[i] += value
+                total[i] += value
+
+        with self._write_lock, self._transaction(immediate=True) as conn:
+            conn.executemany(
+                "INSERT INTO events (user_id, event_type, platform, category, item_id,"
+                " price, cost, occurred_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            conn.execute("INSERT OR IGNORE INTO inventory (user_id) VALUES (?)", (user_id,))
+            conn.execute(
+                "INSERT INTO data_versions (user_id, version) VALUES (?, 1)"
+                " ON CONFLICT (user_id) DO UPDATE SET version = version + 1",
+                (user_id,),
+            )
+            # Apply item changes in event order, batching runs of the same type
+            for event_type, run in itertools.groupby(rows, key=lambda row: row[1]):
+                conn.executemany(
+                    ITEM_STATEMENTS[event_type],
+                    (
+                        {"user_id": user_id, "item_id": row[4], "occurred_at": row[7]}
+                        for row in run
+                    ),
+                )
+            conn.executemany(
+                f"INSERT INTO daily_rollups (user_id, day, platform, category, {ROLLUP_COLUMNS})"
+                f" VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+                f" ON CONFLICT (user_id, day, platform, category) DO UPDATE SET {ROLLUP_UPDATE}",
+                ((user_id, *key, *rollup) for key, rollup in daily.items()),
+            )
+            conn.executemany(
+                f"INSERT INTO monthly_rollups (user_id, month, platform, category, {ROLLUP_COLUMNS})"
+                f" VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+                f" ON CONFLICT (user_id, month, platform, category) DO UPDATE SET {ROLLUP_UPDATE}",
+                ((user_id, *key, *rollup) for key, rollup in monthly.items()),
+            )
+            conn.executemany(
+                f"INSERT INTO totals (user_id, platform, category, {ROLLUP_COLUMNS})"
+                f" VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+                f" ON CONFLICT (user_id, platform, category) DO UPDATE SET {ROLLUP_UPDATE}",
+                ((user_id, *key, *total) for key, total in totals.items()),
+            )
+        return len(rows)
+
+    @contextmanager
+    def snapshot(self) -> Iterator[sqlite3.Connection]:
+        """Connection for a group of reads that should see the same data"""
+        with self._transaction() as conn:
+            yield conn
+
+    def version(self, user_id: str) -> int:
+        """Counter that changes whenever the seller's data does, 0 before any ingest"""
+        row = self._connection().execute(
+            "SELECT version FROM data_versions WHERE user_id = ?", (user_id,)
+        ).fetchone()
+        return row[0] if row else 0
+
+    def platform_totals(self, user_id: str, conn: sqlite3.Connection | None = None) -> list[dict]:
+        """All-time sales figures per platform"""
+        conn = conn or self._connection()
+        rows = conn.execute(
+            "SELECT platform, SUM(sales), SUM(revenue), SUM(cost), SUM(costed_revenue), SUM(listings)"
+            " FROM totals WHERE user_id = ? GROUP BY platform",
+            (user_id,),
+        ).fetchall()
+        return [
+            {
+                "platform": platform,
+                "sales": sales,
+                "revenue": revenue,
+                "cost": cost,
+                "costed_revenue": costed_revenue,
+                "listings": listings,
+            }
+            for platform, sales, revenue, cost, costed_revenue, listings in rows
+        ]
+
+    def category_totals(self, user_id: str, conn: sqlite3.Connection | None = None) -> list[dict]:
+        """All-time sales and revenue per category, highest revenue first"""
+        conn = conn or self._connection()
+        rows = conn.execute(
+            "SELECT category, SUM(sales), SUM(revenue) FROM totals WHERE user_id = ?"
+            " GROUP BY category ORDER BY SUM(revenue) DESC",
+            (user_id,),
+        ).fetchall()
+        return [
+            {"category": category, "sales": sales, "revenue": revenue}
+            for category, sales, revenue in rows
+        ]
+
+    def inventory(self, user_id: str, conn: sqlite3.Connection | None = None) -> dict:
+        conn = conn or self._connection()
+        row = conn.execute(
+            "SELECT total_items, active, sold, days_to_sell_total, days_to_sell_count"
+            " FROM inventory WHERE user_id = ?",
+            (user_id,),
+        ).fetchone()
+        total_items, active, sold, days_total, days_count = row or (0, 0, 0, 0.0, 0)
+        return {
+            "total_items": total_items,
+            "active": active,
+            "sold": sold,
+            "average_days_to_sell": days_total / days_count if days_count else 0.0,
+        }
+
+    def series(
+        self,
+        user_id: str,
+        start: date,
+        end: date,
+        resolution: str = "day",
+        conn: sqlite3.Connection | None = None,
+    ) -> list[tuple[str, int, float]]:
+        """(bucket start, sales, revenue) for each bucket with activity from start to end.
+
+        Days and weeks are summed from daily rollups, months are read from
+        monthly rollups. Week and month buckets are whole, so the first one
+        may start before start.
+        """
+        conn = conn or self._connection()
+        if resolution == "day":
+            query = (
+                "SELECT day, SUM(sales), SUM(revenue) FROM daily_rollups"
+                " WHERE user_id = ? AND day BETWEEN ? AND ? GROUP BY day ORDER BY day"
+            )
+        elif resolution == "week":
+            start -= timedelta(days=start.weekday())
+            query = (
+                f"SELECT {WEEK_START} AS week, SUM(sales), SUM(revenue) FROM daily_rollups"
+                " WHERE user_id = ? AND day BETWEEN ? AND ? GROUP BY week ORDER BY week"
+            )
+        elif resolution == "month":
+            start = start.replace(day=1)
+            query = (
+                "SELECT month, SUM(sales), SUM(revenue) FROM monthly_rollups"
+                " WHERE user_id = ? AND month BETWEEN ? AND ? GROUP BY month ORDER BY month"
+            )
+        else:
+            raise ValueError(f"Unknown resolution: {resolution}")
+        return conn.execute(query, (user_id, start.isoformat(), end.isoformat())).fetchall()
+
+    def platform_revenue(
+        self,
+        user_id: str,
+        start: date,
+        end: date,
+        conn: sqlite3.Connection | None = None,
+    ) -> dict[str, float]:
+        """Revenue per platform from start to end inclusive"""
+        conn = conn or self._connection()
+        rows = conn.execute(
+            "SELECT platform, SUM(revenue) FROM daily_rollups"
+            " WHERE user_id = ? AND day BETWEEN ? AND ? GROUP BY platform",
+            (user_id, start.isoformat(), end.isoformat()),
+        ).fetchall()
+        return dict(rows)
+
+
+sales_event_store = SalesEventStore(ANALYTICS_DB_PATH)
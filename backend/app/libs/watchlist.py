@@ -0,0 +1,112 @@
+"""Keywords sellers reprice regularly, kept warm by the cache warmer.
+
+Usage:
+
+    from app.libs.watchlist import watchlist_store
+
+    watchlist_store.add(user.sub, "nike air max 90")
+    for keywords in watchlist_store.watched_keywords():
+        ...
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+WATCHLIST_DB_PATH = os.environ.get(
+    "WATCHLIST_DB_PATH",
+    str(Path(__file__).resolve().parents[2] / "data" / "watchlist.sqlite3"),
+)
+# Most keywords a single seller can watch
+MAX_WATCHED_KEYWORDS = int(os.environ.get("MAX_WATCHED_KEYWORDS", "100"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS watchlist (
+    id INTEGER PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    keywords TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    UNIQUE (user_id, keywords)
+);
+CREATE INDEX IF NOT EXISTS watchlist_keywords ON watchlist (keywords);
+"""
+
+
+class WatchlistFullError(Exception):
+    pass
+
+
+class WatchlistStore:
+    """Watchlists of all sellers in one SQLite database, safe to share between threads"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            if self.path != ":memory:":
+                Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, isolation_level=None, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def entries(self, user_id: str) -> list[dict]:
+        rows = self._connection().execute(
+            "SELECT id, keywords, created_at FROM watchlist WHERE user_id = ? ORDER BY id",
+            (user_id,),
+        ).fetchall()
+        return [{"id": row[0], "keywords": row[1], "created_at": row[2]} for row in rows]
+
+    def add(self, user_id: str, keywords: str) -> dict:
+        """Watch keywords, returning the existing entry if they are already watched"""
+        conn = self._connection()
+        with self._write_lock:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    "SELECT id, keywords, created_at FROM watchlist WHERE user_id = ? AND keywords = ?",
+                    (user_id, keywords),
+                ).fetchone()
+                if row is None:
+                    (count,) = conn.execute(
+                        "SELECT COUNT(*) FROM watchlist WHERE user_id = ?", (user_id,)
+                    ).fetchone()
+                    if count >= MAX_WATCHED_KEYWORDS:
+                        raise WatchlistFullError(
+                            f"At most {MAX_WATCHED_KEYWORDS} keywords can be watched"
+                        )
+                    created_at = time.time()
+                    cursor = conn.execute(
+                        "INSERT INTO watchlist (user_id, keywords, created_at) VALUES (?, ?, ?)",
+                        (user_id, keywords, created_at),
+                    )
+                    row = (cursor.lastrowid, keywords, created_at)
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+        return {"id": row[0], "keywords": row[1], "created_at": row[2]}
+
+    def remove(self, user_id: str, item_id: int) -> bool:
+        with self._write_lock:
+            cursor = self._connection().execute(
+                "DELETE FROM watchlist WHERE user_id = ? AND id = ?", (user_id, item_id)
+            )
+        return cursor.rowcount > 0
+
+    def watched_keywords(self) -> list[str]:
+        """Keywords watched by anyone, most watched first"""
+        rows = self._connection().execute(
+            "SELECT keywords FROM watchlist GROUP BY keywords ORDER BY COUNT(*) DESC, keywords"
+        ).fetchall()
+        return [row[0] for row in rows]
+
+
+watchlist_store = WatchlistStore(WATCHLIST_DB_PATH)
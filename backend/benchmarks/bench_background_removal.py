@@ -0,0 +1,62 @@
+"""CPU throughput of background removal at several batch sizes.
+
+Runs BackgroundRemover over the same set of product-like photos with
+max_batch_size 1, 4 and 16 and reports images/sec. The model is loaded and
+warmed up before timing, as it is in a running worker.
+
+    cd backend
+    python -m benchmarks.bench_background_removal --images 32 --threads 2
+
+Needs the rembg model (u2net by default) in ~/.u2net or downloadable.
+"""
+
+import argparse
+import time
+
+import numpy as np
+from PIL import Image
+
+from app.apis.product_lookup import BackgroundRemover
+
+
+def make_images(count: int, size: tuple[int, int], seed: int = 0) -> list[Image.Image]:
+    """Plain backgrounds with a coloured blob, roughly like product photos"""
+    rng = np.random.default_rng(seed)
+    width, height = size
+    yy, xx = np.mgrid[:height, :width]
+    images = []
+    for _ in range(count):
+        background = rng.integers(200, 256, 3)
+        img = np.broadcast_to(background, (height, width, 3)).astype(np.uint8).copy()
+        cx, cy = rng.integers(width // 4, 3 * width // 4), rng.integers(height // 4, 3 * height // 4)
+        radius = rng.integers(min(size) // 6, min(size) // 3)
+        img[(xx - cx) ** 2 + (yy - cy) ** 2 < radius**2] = rng.integers(0, 200, 3)
+        images.append(Image.fromarray(img).convert("RGBA"))
+    return images
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", default="u2net")
+    parser.add_argument("--images", type=int, default=32)
+    parser.add_argument("--size", type=int, default=800, help="side of the square test images")
+    parser.add_argument("--threads", type=int, default=2, help="ONNX intra-op threads")
+    parser.add_argument("--batch-sizes", default="1,4,16")
+    args = parser.parse_args()
+
+    images = make_images(args.images, (args.size, args.size))
+    print(f"model={args.model} images={args.images} size={args.size} threads={args.threads}")
+    print(f"{'batch':>5} {'images/s':>9} {'ms/image':>9}")
+    for batch_size in (int(size) for size in args.batch_sizes.split(",")):
+        remover = BackgroundRemover(args.model, args.threads, batch_size, batch_wait_ms=10)
+        remover.warm_up()
+        remover.remove_many(images[:batch_size])
+
+        start = time.perf_counter()
+        remover.remove_many(images)
+        elapsed = time.perf_counter() - start
+        print(f"{batch_size:>5} {args.images / elapsed:>9.2f} {elapsed / args.images * 1000:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
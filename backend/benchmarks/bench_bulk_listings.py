@@ -0,0 +1,154 @@
+"""Items/sec of bulk listing generation against one request per item.
+
+Generates a title and description for the same items three ways, clearing
+the title caches before each:
+
+    baseline  the original per-request code, nltk.pos_tag per over-long title
+    per-item  build_titles and render_description once per item
+    bulk      iter_bulk_listings over all items, as /generate-listings-bulk
+
+    cd backend
+    python -m benchmarks.bench_bulk_listings --items 2000
+
+Needs the NLTK data from `python -m app.libs.nltk_resources`. Without it,
+--stand-in-data trains a small tagger on synthetic titles and writes it,
+with empty punkt parameters, to a temporary NLTK data directory. That model
+is much smaller than the real one, so it understates the cost of the
+baseline reloading it on every call.
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+WORDS = {
+    "NN": ["jacket", "lens", "camera", "boot", "watch", "strap", "case", "drone", "bag", "laptop",
+           "keyboard", "speaker", "controller", "tripod", "charger", "blender", "guitar", "helmet"],
+    "NNP": ["Nike", "Canon", "Sony", "Apple", "Levi", "Bose", "Dyson", "Fender", "Patagonia"],
+    "JJ": ["vintage", "wireless", "leather", "black", "waterproof", "compact", "original", "rare",
+           "lightweight", "mechanical", "portable", "red", "classic", "new", "used"],
+    "CD": ["2", "64", "128", "10", "500"],
+    "IN": ["with", "for", "in"],
+    "DT": ["the", "a"],
+    "CC": ["and"],
+}
+
+
+def write_stand_in_data(directory: str, sentences: int = 5000):
+    """A stand-in tagger and tokenizer in the layout nltk_resources expects"""
+    from nltk.tag.perceptron import PerceptronTagger
+    from nltk.tokenize.punkt import PunktParameters, save_punkt_params
+
+    rng = random.Random(0)
+    shapes = [["JJ", "NN"], ["NNP", "JJ", "NN"], ["DT", "JJ", "NN", "IN", "NN"],
+              ["CD", "NN", "CC", "JJ", "NN"], ["NNP", "NN", "IN", "DT", "JJ", "NN"]]
+    training = [
+        [(rng.choice(WORDS[tag]), tag) for shape in rng.sample(shapes, 2) for tag in shape]
+        for _ in range(sentences)
+    ]
+    tagger = PerceptronTagger(load=False)
+    tagger.train(training, nr_iter=5)
+    tagger.save_to_json(lang="eng", loc=os.path.join(directory, "taggers", "averaged_perceptron_tagger_eng"))
+
+    os.makedirs(os.path.join(directory, "tokenizers", "punkt_tab"))
+    save_punkt_params(PunktParameters(), os.path.join(directory, "tokenizers", "punkt_tab", "english"))
+    os.makedirs(os.path.join(directory, "corpora", "stopwords"))
+    open(os.path.join(directory, "corpora", "stopwords", "english"), "w").close()
+
+
+def make_items(count: int, seed: int = 0):
+    """Distinct items whose joined titles run past the 80 character limit"""
+    from app.apis.listing_ai import BulkListingItem, GenerateDescriptionRequest, GenerateTitleRequest
+
+    rng = random.Random(seed)
+    items = []
+    for i in range(count):
+        fields = {
+            "product_name": f"{rng.choice(WORDS['JJ'])} {rng.choice(WORDS['NN'])} model {i}",
+            "brand": rng.choice(WORDS["NNP"]),
+            "category": rng.choice(WORDS["NN"]),
+            "condition": rng.choice(["new", "like_new", "good", "fair"]),
+            "key_features": [f"{rng.choice(WORDS['JJ'])} {rng.choice(WORDS['JJ'])} {rng.choice(WORDS['NN'])}"
+                             for _ in range(3)],
+        }
+        items.append(BulkListingItem(
+            title=GenerateTitleRequest(**fields),
+            description=GenerateDescriptionRequest(**fields, style="casual"),
+        ))
+    return items
+
+
+def baseline(items):
+    """Titles as /generate-title built them before the change"""
+    from nltk import pos_tag
+    from nltk.tokenize import word_tokenize
+
+    from app.apis.listing_ai import join_title_parts, render_description
+
+    for item in items:
+        title = join_title_parts(item.title)
+        if len(title) > 80:
+            pos_tags = pos_tag(word_tokenize(title))
+            important_words = [word for word, tag in pos_tags
+                               if tag.startswith(("NN", "JJ"))
+                               or (item.title.brand and word.lower() in item.title.brand.lower())]
+            title = " ".join(important_words[:8])
+        render_description(item.description)
+
+
+def per_item(items):
+    from app.apis.listing_ai import build_titles, render_description
+
+    for item in items:
+        build_titles([item.title])
+        render_description(item.description)
+
+
+def bulk(items):
+    from app.apis.listing_ai import iter_bulk_listings
+
+    for _ in iter_bulk_listings(items):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=2000)
+    parser.add_argument("--baseline-items", type=int, default=200,
+                        help="the baseline reloads the tagger per title, so it runs on fewer items")
+    parser.add_argument("--stand-in-data", action="store_true")
+    args = parser.parse_args()
+
+    if args.stand_in_data:
+        directory = tempfile.mkdtemp(prefix="nltk_stand_in_")
+        write_stand_in_data(directory)
+        os.environ["NLTK_DATA_DIR"] = directory
+        os.environ["NLTK_DATA"] = directory
+
+    from app.apis import listing_ai
+    from app.libs.nltk_resources import missing_nltk_resources, word_tokenize
+
+    if missing_nltk_resources():
+        parser.error("NLTK data is missing, provision it or pass --stand-in-data")
+
+    items = make_items(args.items)
+    word_tokenize("warm up")  # Load the shared tagger before timing, as a running worker has
+
+    print(f"{args.items} items ({args.baseline_items} for the baseline), title and description each"
+          + (", stand-in NLTK data" if args.stand_in_data else ""))
+    print(f"{'':>8} {'seconds':>8} {'items/s':>9}")
+    for name, generate, count in (("baseline", baseline, args.baseline_items),
+                                  ("per-item", per_item, args.items),
+                                  ("bulk", bulk, args.items)):
+        listing_ai.pos_tag_cache.clear()
+        listing_ai.title_cache.clear()
+        start = time.perf_counter()
+        generate(items[:count])
+        elapsed = time.perf_counter() - start
+        print(f"{name:>8} {elapsed:>8.2f} {count / elapsed:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
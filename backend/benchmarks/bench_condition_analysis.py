@@ -0,0 +1,107 @@
+"""Latency and memory of condition analysis on large product photos.
+
+Compares the original implementation (plain requests.get, full resolution
+decode, NumPy reductions over every pixel) with the current one (bounded
+streaming download, reduced resolution decode, reused buffers). Each
+implementation runs in its own process so peak RSS can be compared.
+
+    cd backend
+    python -m benchmarks.bench_condition_analysis --width 4032 --height 3024 --runs 20
+"""
+
+import argparse
+import json
+import resource
+import statistics
+import subprocess
+import sys
+import time
+
+import cv2
+import numpy as np
+import requests
+
+
+def baseline(url: str) -> tuple[float, float, float]:
+    """analyze_condition before the change, without the grading"""
+    response = requests.get(url)
+    img_array = np.frombuffer(response.content, np.uint8)
+    img = cv2.imdecode(img_array, cv2.IMREAD_COLOR)
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    brightness = np.mean(gray)
+    edges = cv2.Canny(gray, 100, 200)
+    edge_density = np.sum(edges > 0) / (edges.shape[0] * edges.shape[1])
+    hsv = cv2.cvtColor(img, cv2.COLOR_BGR2HSV)
+    saturation = np.mean(hsv[:, :, 1])
+    return brightness, edge_density, saturation
+
+
+def current(url: str) -> tuple[float, float, float]:
+    """The current download, decode and feature extraction, bypassing the result caches"""
+    from app.apis.listing_ai import decode_for_analysis, download_image, extract_condition_features
+
+    return extract_condition_features(decode_for_analysis(download_image(url)))
+
+
+def peak_rss_mb() -> float:
+    """Peak resident memory of this process since exec"""
+    try:
+        # ru_maxrss on Linux also counts the parent's memory from before exec
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_child(mode: str, url: str, runs: int):
+    analyze = baseline if mode == "baseline" else current
+    analyze(url)  # Import modules and open connections before timing
+    latencies = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        analyze(url)
+        latencies.append((time.perf_counter() - start) * 1000)
+    print(json.dumps({
+        "p50_ms": statistics.median(latencies),
+        "p95_ms": sorted(latencies)[int(len(latencies) * 0.95) - 1],
+        "peak_rss_mb": peak_rss_mb(),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--width", type=int, default=4032)
+    parser.add_argument("--height", type=int, default=3024)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--child", choices=["baseline", "current"], help=argparse.SUPPRESS)
+    parser.add_argument("--url", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, args.url, args.runs)
+        return
+
+    from benchmarks.image_server import ImageServer, make_product_jpeg
+
+    photo = make_product_jpeg(args.width, args.height)
+    server = ImageServer({"/photo.jpg": photo})
+    try:
+        print(f"{args.width}x{args.height} JPEG, {len(photo) / 1e6:.1f} MB, {args.runs} runs")
+        print(f"{'':>9} {'p50 ms':>8} {'p95 ms':>8} {'peak RSS MB':>12}")
+        for mode in ("baseline", "current"):
+            output = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_condition_analysis", "--child", mode,
+                 "--url", server.url("/photo.jpg"), "--runs", str(args.runs)],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            stats = json.loads(output.strip().splitlines()[-1])
+            print(f"{mode:>9} {stats['p50_ms']:>8.1f} {stats['p95_ms']:>8.1f} {stats['peak_rss_mb']:>12.0f}")
+    finally:
+        server.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Throughput of batch condition analysis against a local image server.
+
+Analyzes the same distinct photos once with one /analyze-condition request
+per image, and once with a single streamed /analyze-condition-batch
+request, clearing the result caches in between. The server adds latency
+per download to stand in for remote image hosts.
+
+    cd backend
+    python -m benchmarks.bench_condition_batch --images 64 --latency-ms 50
+"""
+
+import argparse
+import json
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.apis import listing_ai
+from benchmarks.image_server import ImageServer, make_product_jpeg
+
+
+def clear_caches():
+    listing_ai.condition_url_cache.clear()
+    listing_ai.condition_hash_cache.clear()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--images", type=int, default=64)
+    parser.add_argument("--width", type=int, default=1600)
+    parser.add_argument("--height", type=int, default=1200)
+    parser.add_argument("--latency-ms", type=float, default=50)
+    args = parser.parse_args()
+
+    photos = {f"/{i}.jpg": make_product_jpeg(args.width, args.height, seed=i) for i in range(args.images)}
+    server = ImageServer(photos, latency=args.latency_ms / 1000)
+    urls = [server.url(path) for path in photos]
+
+    app = FastAPI()
+    app.include_router(listing_ai.router)
+    client = TestClient(app)
+
+    try:
+        print(
+            f"{args.images} images of {args.width}x{args.height}, "
+            f"{args.latency_ms:.0f}ms download latency, "
+            f"{listing_ai.download_executor._max_workers} download / "
+            f"{listing_ai.analysis_executor._max_workers} analysis workers"
+        )
+        print(f"{'':>10} {'seconds':>8} {'images/s':>9}")
+
+        clear_caches()
+        start = time.perf_counter()
+        for url in urls:
+            client.post("/analyze-condition", json={"image_url": url}).raise_for_status()
+        elapsed = time.perf_counter() - start
+        print(f"{'sequential':>10} {elapsed:>8.2f} {args.images / elapsed:>9.1f}")
+
+        clear_caches()
+        start = time.perf_counter()
+        response = client.post("/analyze-condition-batch", json={"image_urls": urls})
+        results = [json.loads(line) for line in response.iter_lines() if line]
+        elapsed = time.perf_counter() - start
+        assert len(results) == args.images and not any(r["error"] for r in results)
+        print(f"{'batch':>10} {elapsed:>8.2f} {args.images / elapsed:>9.1f}")
+    finally:
+        server.close()
+
+
+if __name__ == "__main__":
+    main()
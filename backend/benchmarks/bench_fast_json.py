@@ -0,0 +1,103 @@
+"""Response encoding time of FastJSONResponse against FastAPI's default path.
+
+Encodes price analyses with growing history and competitor lists both ways:
+
+    default  what FastAPI does when a sync endpoint returns the model:
+             serialize_response against the route's response_model (dump,
+             revalidate in the threadpool, dump again), then JSONResponse
+    fast     FastJSONResponse(model), one model_dump_json
+
+Both bodies are checked to decode to the same JSON before timing.
+
+    cd backend
+    python -m benchmarks.bench_fast_json --rounds 200
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute, serialize_response
+
+from app.apis.price_analysis import (
+    CompetitorListing,
+    MarketTrend,
+    PriceAnalysisResponse,
+    PricePoint,
+)
+from app.libs.fast_json import FastJSONResponse
+
+
+def make_analysis(points: int) -> PriceAnalysisResponse:
+    return PriceAnalysisResponse(
+        suggested_price=42.5,
+        price_range={"min": 10.0, "max": 90.0},
+        confidence_score=0.8,
+        market_trends=[
+            MarketTrend(period=period, average_price=40.0, volume=120, price_change=-2.5)
+            for period in ("day", "week", "month")
+        ],
+        price_history=[
+            PricePoint(price=20.0 + i % 50, date=f"2026-01-{i % 28 + 1:02d}", platform="eBay",
+                       condition="Used", sold=i % 3 == 0)
+            for i in range(points)
+        ],
+        active_competitors=[
+            CompetitorListing(title=f"Vintage camera {i}", price=30.0 + i % 40, platform="Mercari",
+                              condition="Good", url=f"https://example.com/item/{i}",
+                              date_listed="2026-01-15")
+            for i in range(points)
+        ],
+        best_day_to_list="Sunday",
+        best_time_to_list="evening",
+    )
+
+
+async def encode_default(route: APIRoute, model) -> bytes:
+    content = await serialize_response(
+        field=route.secure_cloned_response_field, response_content=model, is_coroutine=False
+    )
+    return JSONResponse(content).body
+
+
+def encode_fast(model) -> bytes:
+    return FastJSONResponse(model).body
+
+
+async def time_encoding(route: APIRoute, model, rounds: int) -> tuple[float, float]:
+    default, fast = [], []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        await encode_default(route, model)
+        default.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        encode_fast(model)
+        fast.append(time.perf_counter() - start)
+    return statistics.median(default) * 1000, statistics.median(fast) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 5000],
+                        help="price history points and competitors per analysis")
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    route = APIRoute("/analyze-price", lambda: None, response_model=PriceAnalysisResponse)
+
+    print(f"{'items':>6} {'KB':>7} {'default ms':>11} {'fast ms':>8} {'speedup':>8}")
+    for size in args.sizes:
+        model = make_analysis(size)
+        default_body = asyncio.run(encode_default(route, model))
+        assert json.loads(default_body) == json.loads(encode_fast(model))
+
+        default_ms, fast_ms = asyncio.run(time_encoding(route, model, args.rounds))
+        print(f"{size:>6} {len(default_body) / 1024:>7.1f} {default_ms:>11.3f} "
+              f"{fast_ms:>8.3f} {default_ms / fast_ms:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
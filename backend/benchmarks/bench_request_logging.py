@@ -0,0 +1,119 @@
+"""Request throughput with per-request prints against queued, sampled logging.
+
+Each request goes through RequestIdMiddleware to an endpoint that emits the
+per-request "User authenticated" message the way authorize_token does:
+
+    print    print(f"User {sub} authenticated"), as before the change
+    logging  logger.info(..., extra={"sampled": True}) after setup_logging()
+
+Each mode runs in its own process with stdout piped back to this one, as a
+container runtime captures it, and unbuffered as PYTHONUNBUFFERED=1 makes it.
+
+    cd backend
+    python -m benchmarks.bench_request_logging --requests 5000 --concurrency 32
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import subprocess
+import sys
+import time
+
+
+def make_app(mode: str):
+    from fastapi import FastAPI
+
+    from databutton_app.mw.request_id_mw import RequestIdMiddleware
+
+    logger = logging.getLogger("databutton_app.mw.auth_mw")
+
+    def authenticated(sub: str):
+        if mode == "print":
+            print(f"User {sub} authenticated")
+        else:
+            logger.info("User authenticated", extra={"user": sub, "sampled": True})
+
+    app = FastAPI()
+    app.add_middleware(RequestIdMiddleware)
+
+    @app.get("/item/{item_id}")
+    def get_item(item_id: int):
+        authenticated(f"user-{item_id % 100}")
+        return {"id": item_id}
+
+    return app
+
+
+async def drive(app, requests: int, concurrency: int) -> float:
+    import httpx
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await client.get("/item/0")
+        queue = asyncio.Queue()
+        for i in range(requests):
+            queue.put_nowait(i)
+
+        async def worker():
+            while not queue.empty():
+                response = await client.get(f"/item/{queue.get_nowait()}")
+                response.raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return time.perf_counter() - start
+
+
+def run_child(mode: str, requests: int, concurrency: int):
+    if mode == "logging":
+        from databutton_app.logging_config import setup_logging
+
+        setup_logging(level="INFO")
+        # The benchmark client logs every request itself
+        logging.getLogger("httpx").setLevel(logging.WARNING)
+    elapsed = asyncio.run(drive(make_app(mode), requests, concurrency))
+    # The parent reads the last line, so it must come after any queued records
+    logging.shutdown()
+    from databutton_app import logging_config
+
+    if logging_config._listener is not None:
+        logging_config._listener.stop()
+    print(json.dumps({"elapsed": elapsed}), flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--sample-rate", default="0.01")
+    parser.add_argument("--buffered", action="store_true", help="do not set PYTHONUNBUFFERED")
+    parser.add_argument("--child", choices=["print", "logging"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, args.requests, args.concurrency)
+        return
+
+    env = dict(os.environ, LOG_SAMPLE_RATE=args.sample_rate)
+    env.pop("PYTHONUNBUFFERED", None)
+    if not args.buffered:
+        env["PYTHONUNBUFFERED"] = "1"
+
+    print(f"{args.requests} requests, concurrency {args.concurrency}, "
+          f"sample rate {args.sample_rate}, {'buffered' if args.buffered else 'unbuffered'} stdout")
+    print(f"{'':>7} {'req/s':>8} {'stdout lines':>13}")
+    for mode in ("print", "logging"):
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_request_logging", "--child", mode,
+             "--requests", str(args.requests), "--concurrency", str(args.concurrency)],
+            check=True, capture_output=True, text=True, env=env,
+        ).stdout.splitlines()
+        elapsed = json.loads(output[-1])["elapsed"]
+        print(f"{mode:>7} {args.requests / elapsed:>8.0f} {len(output) - 1:>13}")
+
+
+if __name__ == "__main__":
+    main()
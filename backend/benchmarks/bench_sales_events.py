@@ -0,0 +1,122 @@
+"""Ingest throughput and summary latency of the sales event store.
+
+Ingests synthetic listing, sale and delisting events for one seller spread
+over several years, in batches the size /events accepts, then times
+compute_analytics_summary for the default 30 day trend, a year and the
+whole history.
+
+    cd backend
+    python -m benchmarks.bench_sales_events --events 10000000
+
+The database is written to a temporary directory unless --path is given.
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+Event = namedtuple("Event", "event_type platform category item_id price cost occurred_at")
+
+PLATFORMS = ["eBay", "Poshmark", "Mercari", "Depop"]
+CATEGORIES = ["Shoes", "Tops", "Bottoms", "Bags", "Jewelry", "Outerwear", "Electronics", "Home"]
+
+
+def make_batches(total: int, batch_size: int, years: int, seed: int = 0):
+    """Batches of events in time order; each lists new items and sells or delists earlier ones"""
+    rng = np.random.default_rng(seed)
+    end = datetime.now(timezone.utc)
+    start = end - timedelta(days=365 * years)
+    span = (end - start).total_seconds()
+    batches = (total + batch_size - 1) // batch_size
+    listed = 0
+
+    for b in range(batches):
+        size = min(batch_size, total - b * batch_size)
+        offsets = np.sort(rng.uniform(b / batches, (b + 1) / batches, size)) * span
+        kinds = rng.choice(3, size, p=[0.5, 0.4, 0.1])
+        platforms = rng.integers(0, len(PLATFORMS), size)
+        categories = rng.integers(0, len(CATEGORIES), size)
+        prices = np.round(rng.lognormal(3.5, 0.6, size), 2)
+        costed = rng.random(size) < 0.7
+
+        events = []
+        for i in range(size):
+            occurred_at = start + timedelta(seconds=float(offsets[i]))
+            if kinds[i] == 0 or listed == 0:
+                item = listed
+                listed += 1
+                event_type = "listed"
+            else:
+                item = int(rng.integers(0, listed))
+                event_type = "sold" if kinds[i] == 1 else "delisted"
+            events.append(Event(
+                event_type,
+                PLATFORMS[platforms[i]],
+                CATEGORIES[categories[i]],
+                f"item-{item}",
+                float(prices[i]),
+                float(prices[i]) * 0.4 if costed[i] else None,
+                occurred_at,
+            ))
+        yield events
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=10_000_000)
+    parser.add_argument("--batch-size", type=int, default=50_000)
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--queries", type=int, default=100, help="summaries timed per range")
+    parser.add_argument("--path", help="database file, a temporary one by default")
+    args = parser.parse_args()
+
+    path = args.path or os.path.join(tempfile.mkdtemp(prefix="sales_events_"), "bench.sqlite3")
+    # The summary reads the module level store, so point it at this database before importing
+    os.environ["ANALYTICS_DB_PATH"] = path
+    from app.apis.analytics import compute_analytics_summary
+    from app.libs.sales_events import sales_event_store
+
+    user = "bench-seller"
+    print(f"{args.events} events over {args.years} years in batches of {args.batch_size}, {path}")
+
+    generating = ingesting = 0.0
+    batches = make_batches(args.events, args.batch_size, args.years)
+    while True:
+        start = time.perf_counter()
+        events = next(batches, None)
+        generating += time.perf_counter() - start
+        if events is None:
+            break
+        start = time.perf_counter()
+        sales_event_store.ingest(user, events)
+        ingesting += time.perf_counter() - start
+    print(f"ingest: {ingesting:.1f}s, {args.events / ingesting:,.0f} events/s "
+          f"(generating events took another {generating:.1f}s)")
+    print(f"database: {os.path.getsize(path) / 1e6:,.0f} MB")
+
+    today = datetime.now(timezone.utc).date()
+    ranges = {
+        "30 days": (None, None),
+        "1 year": (today - timedelta(days=364), today),
+        f"{args.years} years": (today - timedelta(days=365 * args.years), today),
+    }
+    print(f"{'summary':>10} {'p50 ms':>8} {'p95 ms':>8}")
+    for name, (start_date, end_date) in ranges.items():
+        latencies = []
+        for _ in range(args.queries):
+            start = time.perf_counter()
+            compute_analytics_summary(user, start_date, end_date)
+            latencies.append((time.perf_counter() - start) * 1000)
+        latencies.sort()
+        print(f"{name:>10} {statistics.median(latencies):>8.1f} "
+              f"{latencies[max(0, int(len(latencies) * 0.95) - 1)]:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
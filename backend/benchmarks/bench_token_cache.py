@@ -0,0 +1,65 @@
+"""Per-request cost of authorize_token with and without the verified token cache.
+
+Signs RS256 tokens for a pool of users and authorizes them round robin, as
+requests from active sessions arrive. The JWKS lookup is replaced by the
+signing key itself, as JWKSKeyStore serves it from memory once refreshed,
+so the difference is the RSA signature check and claim validation:
+
+    off  the cache is cleared before every call, every token is verified
+    on   each token is verified once, later calls hit the cache
+
+    cd backend
+    python -m benchmarks.bench_token_cache --calls 20000 --users 100
+"""
+
+import argparse
+import logging
+import statistics
+import time
+
+import jwt
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+from databutton_app.mw import auth_mw
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=20_000)
+    parser.add_argument("--users", type=int, default=100, help="distinct tokens in rotation")
+    args = parser.parse_args()
+
+    logging.getLogger("databutton_app").setLevel(logging.WARNING)
+
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    auth_mw.get_signing_key = lambda url, token: (key.public_key(), "RS256")
+    auth_config = auth_mw.AuthConfig(
+        jwks_url="https://example.com/jwks", audience="app", header="authorization"
+    )
+    exp = int(time.time()) + 3600
+    tokens = [
+        jwt.encode({"sub": f"user-{i}", "aud": "app", "exp": exp}, key, algorithm="RS256")
+        for i in range(args.users)
+    ]
+    cache = auth_mw.verified_token_cache
+
+    print(f"{args.calls} calls over {args.users} tokens, RS256 with a 2048 bit key")
+    print(f"{'cache':>5} {'p50 us':>8} {'p95 us':>8} {'calls/s':>9}")
+    for mode in ("off", "on"):
+        cache.clear()
+        latencies = []
+        for i in range(args.calls):
+            if mode == "off":
+                cache.clear()
+            start = time.perf_counter()
+            user = auth_mw.authorize_token(tokens[i % args.users], auth_config)
+            latencies.append(time.perf_counter() - start)
+            assert user is not None
+        latencies.sort()
+        print(f"{mode:>5} {statistics.median(latencies) * 1e6:>8.1f} "
+              f"{latencies[int(len(latencies) * 0.95) - 1] * 1e6:>8.1f} "
+              f"{args.calls / sum(latencies):>9,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Synthetic product photos and a local HTTP server to download them from."""
+
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import cv2
+import numpy as np
+
+
+def make_product_jpeg(width: int, height: int, seed: int = 0, quality: int = 90) -> bytes:
+    """A textured object on a light background, encoded like a camera JPEG"""
+    rng = np.random.default_rng(seed)
+    img = np.full((height, width, 3), rng.integers(200, 250, 3), np.uint8)
+    center = (int(rng.integers(width // 3, 2 * width // 3)), int(rng.integers(height // 3, 2 * height // 3)))
+    axes = (int(width * rng.uniform(0.15, 0.3)), int(height * rng.uniform(0.15, 0.3)))
+    cv2.ellipse(img, center, axes, float(rng.uniform(0, 180)), 0, 360, rng.integers(0, 200, 3).tolist(), -1)
+    for _ in range(40):
+        start = (int(rng.integers(0, width)), int(rng.integers(0, height)))
+        end = (int(rng.integers(0, width)), int(rng.integers(0, height)))
+        cv2.line(img, start, end, rng.integers(0, 256, 3).tolist(), int(rng.integers(1, 6)))
+    # Sensor noise, which is what makes real photos large
+    noise = rng.normal(0, 6, img.shape)
+    img = np.clip(img + noise, 0, 255).astype(np.uint8)
+    ok, encoded = cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    assert ok
+    return encoded.tobytes()
+
+
+class ImageServer:
+    """Serves a dict of path -> bytes over HTTP on localhost, optionally with added latency"""
+
+    def __init__(self, images: dict[str, bytes], latency: float = 0.0):
+        self.images = images
+        self.latency = latency
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                time.sleep(server.latency)
+                body = server.images.get(self.path)
+                if body is None:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "image/jpeg")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.base_url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def url(self, path: str) -> str:
+        return self.base_url + path
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
@@ -0,0 +1,124 @@
+"""JWKS signing key store with background refresh.
+
+Keys are prefetched when the store starts and refreshed by a background
+thread before the Cache-Control max-age of the last response runs out, so
+requests normally find keys in memory. A token with an unknown key id
+triggers at most one refetch per min_refetch_interval, shared by every
+request waiting on it.
+"""
+
+import json
+import logging
+import re
+import threading
+import time
+import urllib.request
+
+from jwt import PyJWK, PyJWKSet
+
+logger = logging.getLogger(__name__)
+
+MAX_AGE_RE = re.compile(r"max-age=(\d+)")
+
+
+class JWKSKeyStore:
+    def __init__(
+        self,
+        url: str,
+        default_max_age: float = 3600,
+        min_refetch_interval: float = 10,
+        refresh_margin: float = 60,
+        retry_interval: float = 15,
+        timeout: float = 10,
+    ):
+        self.url = url
+        self.default_max_age = default_max_age
+        self.min_refetch_interval = min_refetch_interval
+        self.refresh_margin = refresh_margin
+        self.retry_interval = retry_interval
+        self.timeout = timeout
+
+        self._keys: dict[str, PyJWK] = {}
+        self._expires_at = 0.0
+        self._last_fetch = float("-inf")
+        self._last_unknown_kid_fetch = float("-inf")
+        self._fetch_lock = threading.Lock()
+        self._refresher: threading.Thread | None = None
+        self._start_lock = threading.Lock()
+        self._stopped = threading.Event()
+
+    def _fetch(self):
+        request = urllib.request.Request(
+            self.url, headers={"User-agent": "databutton-app-jwks"}
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            data = json.load(response)
+            cache_control = response.headers.get("Cache-Control", "")
+
+        match = MAX_AGE_RE.search(cache_control)
+        max_age = int(match.group(1)) if match else self.default_max_age
+
+        jwk_set = PyJWKSet.from_dict(data)
+        # Swap the whole dict so readers never see a partial update
+        self._keys = {key.key_id: key for key in jwk_set.keys if key.key_id}
+        self._expires_at = time.monotonic() + max_age
+
+    def refresh(self, requested_at: float | None = None):
+        """Fetch the key set, unless another thread started a fetch since requested_at"""
+        if requested_at is None:
+            requested_at = time.monotonic()
+        with self._fetch_lock:
+            self._fetch_unless_newer(requested_at)
+
+    def _fetch_unless_newer(self, requested_at: float):
+        # Called with _fetch_lock held
+        if self._last_fetch >= requested_at:
+            return
+        self._last_fetch = time.monotonic()
+        self._fetch()
+
+    def _refresh_for_unknown_kid(self):
+        """Refetch for a key id we don't have, at most once per min_refetch_interval"""
+        requested_at = time.monotonic()
+        # Checked and fetched under one lock, so requests arriving meanwhile wait for the keys
+        with self._fetch_lock:
+            if requested_at - self._last_unknown_kid_fetch < self.min_refetch_interval:
+                return
+            self._last_unknown_kid_fetch = requested_at
+            self._fetch_unless_newer(requested_at)
+
+    def get_signing_key(self, kid: str | None) -> PyJWK:
+        key = self._keys.get(kid)
+        if key is None:
+            # Not prefetched yet or possibly a key rotation
+            self._refresh_for_unknown_kid()
+            key = self._keys.get(kid)
+        if key is None:
+            raise LookupError(f"Unable to find a signing key that matches '{kid}'")
+        return key
+
+    def start(self):
+        """Prefetch keys and keep them fresh from a background thread"""
+        with self._start_lock:
+            if self._refresher is None:
+                self._refresher = threading.Thread(
+                    target=self._refresh_loop, name="jwks-refresh", daemon=True
+                )
+                self._refresher.start()
+
+    def stop(self):
+        """Stop the background refresher"""
+        self._stopped.set()
+
+    def _refresh_loop(self):
+        while not self._stopped.is_set():
+            try:
+                self.refresh()
+                delay = max(
+                    self._expires_at - time.monotonic() - self.refresh_margin,
+                    self.min_refetch_interval,
+                )
+            except Exception as e:
+                logger.error("Failed to refresh JWKS from %s: %s", self.url, e)
+                delay = self.retry_interval
+            self._stopped.wait(delay)
@@ -0,0 +1,178 @@
+"""Deferred loading of API routers.
+
+Routes are read from each API module's source without importing it, and
+registered as placeholders. The first request to any of a module's routes
+(or a background warm-up) imports the module and from then on requests are
+forwarded to its real router.
+"""
+
+import ast
+import asyncio
+import inspect
+import logging
+import pathlib
+import threading
+import time
+from typing import Sequence
+
+import anyio
+from fastapi import APIRouter, FastAPI, params
+from fastapi.openapi.utils import get_openapi
+
+from databutton_app import profiler
+from databutton_app.startup_profile import startup_profile
+
+logger = logging.getLogger(__name__)
+
+HTTP_METHODS = {"get", "post", "put", "patch", "delete", "head", "options"}
+
+
+def discover_routes(module_path: pathlib.Path) -> list[tuple[str, list[str]]]:
+    """Find (path, methods) of every `@router.<method>(path)` endpoint in a module's source"""
+    tree = ast.parse(module_path.read_text())
+
+    routes = []
+    for node in ast.walk(tree):
+        if not isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            continue
+        for decorator in node.decorator_list:
+            if not (
+                isinstance(decorator, ast.Call)
+                and isinstance(decorator.func, ast.Attribute)
+                and isinstance(decorator.func.value, ast.Name)
+                and decorator.func.value.id == "router"
+                and decorator.func.attr in HTTP_METHODS
+                and decorator.args
+                and isinstance(decorator.args[0], ast.Constant)
+            ):
+                continue
+            routes.append((decorator.args[0].value, [decorator.func.attr.upper()]))
+    return routes
+
+
+class LazyRouterApp:
+    """ASGI app standing in for every route of one API module until it is loaded"""
+
+    def __init__(
+        self,
+        name: str,
+        module_name: str,
+        prefix: str,
+        dependencies: Sequence[params.Depends],
+    ):
+        self.name = name
+        self.module_name = module_name
+        self.prefix = prefix
+        self.dependencies = list(dependencies)
+        self.app: FastAPI | None = None
+        self._lock = threading.Lock()
+
+    def load(self, parent_app: FastAPI) -> FastAPI:
+        """Import the module and build an app serving its router, once"""
+        with self._lock:
+            if self.app is not None:
+                return self.app
+
+            with startup_profile.module_import(self.name):
+                api_module = __import__(self.module_name, fromlist=[self.name])
+            api_router = getattr(api_module, "router", None)
+            if not isinstance(api_router, APIRouter):
+                raise RuntimeError(f"API {self.name} has no router")
+
+            app = FastAPI(openapi_url=None)
+            # Share auth config and other state with the app serving requests
+            app.state = parent_app.state
+            app.include_router(
+                api_router, prefix=self.prefix, dependencies=self.dependencies
+            )
+            profiler.instrument_routes(app.routes)
+
+            # The sub-app never runs a lifespan of its own, so run the
+            # module's startup hooks here
+            for handler in api_router.on_startup:
+                result = handler()
+                if inspect.isawaitable(result):
+                    asyncio.run(result)
+
+            logger.info("Loaded API: %s", self.name)
+            self.app = app
+            return app
+
+    async def __call__(self, scope, receive, send):
+        app = self.app
+        if app is None:
+            app = await anyio.to_thread.run_sync(self.load, scope["app"])
+        await app(scope, receive, send)
+
+
+def add_lazy_routes(
+    routes: APIRouter,
+    name: str,
+    module_name: str,
+    module_path: pathlib.Path,
+    dependencies: Sequence[params.Depends],
+) -> LazyRouterApp:
+    """Register placeholders for a module's routes on routes without importing the module"""
+    lazy_app = LazyRouterApp(name, module_name, routes.prefix, dependencies)
+    for path, methods in discover_routes(module_path):
+        routes.add_route(
+            routes.prefix + path, lazy_app, methods=methods, include_in_schema=False
+        )
+    return lazy_app
+
+
+def install_lazy_openapi(app: FastAPI, lazy_apps: list[LazyRouterApp]):
+    """Generate app's OpenAPI schema from the real routes of lazily registered modules.
+
+    Placeholders are left out of the schema, so the first schema request
+    loads every module that isn't loaded yet. Until the warm-up has run,
+    that request waits on the imports.
+    """
+
+    def openapi() -> dict:
+        if not app.openapi_schema:
+            routes = list(app.routes)
+            for lazy_app in lazy_apps:
+                try:
+                    routes.extend(lazy_app.load(app).routes)
+                except Exception as e:
+                    logger.error("Failed to load API %s: %s", lazy_app.name, e)
+            # The same arguments FastAPI.openapi passes, with the loaded routes added
+            app.openapi_schema = get_openapi(
+                title=app.title,
+                version=app.version,
+                openapi_version=app.openapi_version,
+                summary=app.summary,
+                description=app.description,
+                terms_of_service=app.terms_of_service,
+                contact=app.contact,
+                license_info=app.license_info,
+                routes=routes,
+                webhooks=app.webhooks.routes,
+                tags=app.openapi_tags,
+                servers=app.servers,
+                separate_input_output_schemas=app.separate_input_output_schemas,
+            )
+        return app.openapi_schema
+
+    app.openapi = openapi
+
+
+def warm_up_lazy_routers(
+    app: FastAPI, lazy_apps: list[LazyRouterApp], delay: float = 1.0
+):
+    """Load lazily registered routers in a background thread.
+
+    Loading starts after delay seconds, giving the server time to start
+    accepting connections first.
+    """
+
+    def warm_up():
+        time.sleep(delay)
+        for lazy_app in lazy_apps:
+            try:
+                lazy_app.load(app)
+            except Exception as e:
+                logger.error("Failed to load API %s: %s", lazy_app.name, e)
+
+    threading.Thread(target=warm_up, name="router-warmup", daemon=True).start()
@@ -1,13 +1,22 @@
 import functools
+import hashlib
+import logging
+import os
+import time
 from http import HTTPStatus
 from typing import Annotated, Callable
 import jwt
 from fastapi import Depends, HTTPException, WebSocket, WebSocketException, status
 from fastapi.requests import HTTPConnection
-from jwt import PyJWKClient
 from pydantic import BaseModel
 from starlette.requests import Request
 
+from databutton_app.jwks import JWKSKeyStore
+from databutton_app.lru_cache import LRUCache
+from databutton_app.metrics import stage_timer
+
+logger = logging.getLogger(__name__)
+
 
 class AuthConfig(BaseModel):
     jwks_url: str
@@ -26,6 +35,22 @@ class User(BaseModel):
     email: str | None = None
 
 
+# Users from tokens that passed signature verification, keyed by a hash of
+# the token and its audience. Entries expire at the token's exp claim or
+# after AUTH_TOKEN_CACHE_MAX_TTL seconds, whichever comes first.
+AUTH_TOKEN_CACHE_MAX_TTL = float(os.environ.get("AUTH_TOKEN_CACHE_MAX_TTL", "300"))
+verified_token_cache = LRUCache(
+    maxsize=int(os.environ.get("AUTH_TOKEN_CACHE_SIZE", "10000")),
+    ttl=AUTH_TOKEN_CACHE_MAX_TTL,
+)
+
+
+def token_cache_key(token: str, auth_config: AuthConfig) -> str:
+    return hashlib.sha256(
+        f"{auth_config.audience}\0{auth_config.jwks_url}\0{token}".encode()
+    ).hexdigest()
+
+
 def get_auth_config(request: HTTPConnection) -> AuthConfig:
     auth_config: AuthConfig | None = request.app.state.auth_config
 
@@ -48,6 +73,13 @@ AuditLogDep = Annotated[Callable[[str], None] | None, Depends(get_audit_log)]
 
 def get_authorized_user(
     request: HTTPConnection,
+) -> User:
+    with stage_timer("auth"):
+        return _get_authorized_user(request)
+
+
+def _get_authorized_user(
+    request: HTTPConnection,
 ) -> User:
     auth_config = get_auth_config(request)
 
@@ -61,9 +93,9 @@ def get_authorized_user(
 
         if user is not None:
             return user
-        print("Request authentication returned no user")
+        logger.info("Request authentication returned no user")
     except Exception as e:
-        print(f"Request authentication failed: {e}")
+        logger.warning("Request authentication failed: %s", e)
 
     if isinstance(request, WebSocket):
         raise WebSocketException(
@@ -76,14 +108,16 @@ def get_authorized_user(
 
 
 @functools.cache
-def get_jwks_client(url: str):
-    """Reuse client cached by its url, client caches keys by default."""
-    return PyJWKClient(url, cache_keys=True)
+def get_jwks_client(url: str) -> JWKSKeyStore:
+    """Reuse key store cached by its url, keys are refreshed in the background."""
+    client = JWKSKeyStore(url)
+    client.start()
+    return client
 
 
 def get_signing_key(url: str, token: str) -> tuple[str, str]:
     client = get_jwks_client(url)
-    signing_key = client.get_signing_key_from_jwt(token)
+    signing_key = client.get_signing_key(jwt.get_unverified_header(token).get("kid"))
     key = signing_key.key
     alg = signing_key.algorithm_name
     if alg != "RS256":
@@ -111,7 +145,7 @@ def authorize_websocket(
             break
 
     if not token:
-        print(f"Missing bearer {prefix}.<token> in protocols")
+        logger.info("Missing bearer %s.<token> in protocols", prefix)
         return None
 
     return authorize_token(token, auth_config)
@@ -123,12 +157,12 @@ def authorize_request(
 ) -> User | None:
     auth_header = request.headers.get(auth_config.header)
     if not auth_header:
-        print(f"Missing header '{auth_config.header}'")
+        logger.info("Missing header '%s'", auth_config.header)
         return None
 
     token = auth_header.startswith("Bearer ") and auth_header[7:]
     if not token:
-        print(f"Missing bearer token in '{auth_config.header}'")
+        logger.info("Missing bearer token in '%s'", auth_config.header)
         return None
 
     return authorize_token(token, auth_config)
@@ -138,6 +172,12 @@ def authorize_token(
     token: str,
     auth_config: AuthConfig,
 ) -> User | None:
+    # Tokens are reused for up to an hour, skip verifying ones seen recently
+    cache_key = token_cache_key(token, auth_config)
+    user = verified_token_cache.get(cache_key)
+    if user is not None:
+        return user
+
     # Audience and jwks url to get signing key from based on the users config
     jwks_urls = [(auth_config.audience, auth_config.jwks_url)]
 
@@ -146,7 +186,7 @@ def authorize_token(
         try:
             key, alg = get_signing_key(jwks_url, token)
         except Exception as e:
-            print(f"Failed to get signing key {e}")
+            logger.warning("Failed to get signing key %s", e)
             continue
 
         try:
@@ -157,13 +197,18 @@ def authorize_token(
                 audience=audience,
             )
         except jwt.PyJWTError as e:
-            print(f"Failed to decode and validate token {e}")
+            logger.info("Failed to decode and validate token %s", e)
             continue
 
     try:
         user = User.model_validate(payload)
-        print(f"User {user.sub} authenticated")
+        logger.info("User authenticated", extra={"user": user.sub, "sampled": True})
+        exp = payload.get("exp")
+        if isinstance(exp, (int, float)):
+            ttl = min(exp - time.time(), AUTH_TOKEN_CACHE_MAX_TTL)
+            if ttl > 0:
+                verified_token_cache.set(cache_key, user, ttl=ttl)
         return user
     except Exception as e:
-        print(f"Failed to parse token payload {e}")
+        logger.info("Failed to parse token payload %s", e)
         return None
@@ -0,0 +1,59 @@
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from databutton_app.metrics import request_duration, requests_in_flight
+
+# Endpoint function -> route path template, filled in as endpoints are seen
+_route_paths: dict = {}
+
+
+def get_route_path(scope: Scope) -> str:
+    """Path template of the route that served the request, e.g. /routes/summary"""
+    endpoint = scope.get("endpoint")
+    if endpoint is None:
+        return "unmatched"
+
+    path = _route_paths.get(endpoint)
+    if path is None:
+        # scope["app"] is the innermost app, which for lazily loaded routers
+        # is the one holding the real route
+        for route in getattr(scope.get("app"), "routes", []):
+            route_endpoint = getattr(route, "endpoint", None)
+            if route_endpoint is not None:
+                _route_paths.setdefault(route_endpoint, route.path)
+        path = _route_paths.setdefault(endpoint, "unmatched")
+    return path
+
+
+class MetricsMiddleware:
+    """Record request latency by method, route template and status"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        requests_in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            request_duration.observe(
+                time.perf_counter() - start,
+                scope["method"],
+                get_route_path(scope),
+                str(status),
+            )
+            requests_in_flight.dec()
@@ -0,0 +1,63 @@
+import cProfile
+import uuid
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from databutton_app.logging_config import request_id_var
+from databutton_app.profiler import (
+    is_authorized,
+    request_profile_lock,
+    request_profile_var,
+    save_request_profile,
+)
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_ID_HEADER = b"x-profile-id"
+
+
+class RequestProfileMiddleware:
+    """Run the endpoint of requests carrying a valid X-Profile token under cProfile.
+
+    The response gets an X-Profile-Id header naming the stored profile, or
+    X-Profile-Id: busy when another request is already being profiled.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        token = None
+        for name, value in scope["headers"]:
+            if name == PROFILE_HEADER:
+                token = value.decode("latin-1")
+                break
+        if token is None or not is_authorized(token):
+            await self.app(scope, receive, send)
+            return
+
+        acquired = request_profile_lock.acquire(blocking=False)
+        profile_id = (request_id_var.get() or uuid.uuid4().hex) if acquired else "busy"
+
+        async def send_with_profile_id(message: Message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((PROFILE_ID_HEADER, profile_id.encode("latin-1")))
+                message["headers"] = headers
+            await send(message)
+
+        if not acquired:
+            await self.app(scope, receive, send_with_profile_id)
+            return
+
+        profile = cProfile.Profile()
+        var_token = request_profile_var.set(profile)
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            request_profile_var.reset(var_token)
+            request_profile_lock.release()
+            save_request_profile(profile_id, profile)
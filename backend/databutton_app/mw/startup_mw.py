@@ -0,0 +1,35 @@
+import time
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from databutton_app.startup_profile import startup_profile
+
+
+def get_endpoint_name(endpoint) -> str:
+    name = getattr(endpoint, "__qualname__", None) or type(endpoint).__qualname__
+    return f"{endpoint.__module__}.{name}"
+
+
+class FirstRequestTimingMiddleware:
+    """Record the latency of the first request served by each endpoint"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            # Routing stores the matched endpoint in the shared scope
+            endpoint = scope.get("endpoint")
+            if endpoint is not None:
+                name = f"{scope['method']} {get_endpoint_name(endpoint)}"
+                if not startup_profile.has_first_request(name):
+                    startup_profile.record_first_request(
+                        name, time.perf_counter() - start
+                    )
@@ -0,0 +1,196 @@
+"""On-demand profiling of a live worker.
+
+Two tools, both only enabled when PROFILER_TOKEN is set:
+
+- A stack sampler that records every thread's stack at a fixed rate for a
+  number of seconds and returns collapsed stacks ("frame;frame;frame count"
+  lines), the input format of flamegraph.pl and speedscope. Started from
+  /debug/profile or by sending the worker SIGUSR2.
+- Per-request cProfile, for requests sent with an X-Profile header carrying
+  the token. The endpoint call is profiled in whichever thread runs it and
+  the stats are kept for retrieval from /debug/profiles/{request_id}.
+"""
+
+import collections
+import contextvars
+import cProfile
+import functools
+import hmac
+import inspect
+import io
+import logging
+import os
+import pstats
+import signal
+import sys
+import tempfile
+import threading
+import time
+
+from fastapi.routing import APIRoute
+
+logger = logging.getLogger(__name__)
+
+PROFILER_TOKEN = os.environ.get("PROFILER_TOKEN") or None
+PROFILE_OUTPUT_DIR = os.environ.get("PROFILE_OUTPUT_DIR", tempfile.gettempdir())
+SIGNAL_PROFILE_SECONDS = float(os.environ.get("SIGNAL_PROFILE_SECONDS", "10"))
+MAX_PROFILE_SECONDS = 120
+MAX_SAMPLE_RATE = 1000
+# Completed request profiles kept for retrieval
+MAX_REQUEST_PROFILES = 20
+
+_sampling_lock = threading.Lock()
+
+request_profile_var: contextvars.ContextVar[cProfile.Profile | None] = (
+    contextvars.ContextVar("request_profile", default=None)
+)
+# Only one cProfile profiler can be active in the interpreter at a time
+request_profile_lock = threading.Lock()
+_request_profiles: collections.OrderedDict[str, str] = collections.OrderedDict()
+_request_profiles_lock = threading.Lock()
+
+
+def profiling_enabled() -> bool:
+    return PROFILER_TOKEN is not None
+
+
+def is_authorized(token: str | None) -> bool:
+    return (
+        PROFILER_TOKEN is not None
+        and token is not None
+        and hmac.compare_digest(token.encode(), PROFILER_TOKEN.encode())
+    )
+
+
+class ProfilerBusyError(RuntimeError):
+    pass
+
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    filename = code.co_filename.replace(";", ":")
+    return f"{code.co_name} ({filename}:{frame.f_lineno})"
+
+
+def sample_stacks(seconds: float, rate: float = 100) -> str:
+    """Sample all thread stacks rate times a second and return collapsed stacks"""
+    seconds = min(max(seconds, 0.1), MAX_PROFILE_SECONDS)
+    interval = 1 / min(max(rate, 1), MAX_SAMPLE_RATE)
+
+    if not _sampling_lock.acquire(blocking=False):
+        raise ProfilerBusyError("A profile is already running")
+    try:
+        own_thread = threading.get_ident()
+        counts: collections.Counter[str] = collections.Counter()
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            thread_names = {t.ident: t.name for t in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_thread:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_name(frame))
+                    frame = frame.f_back
+                stack.append(thread_names.get(thread_id, str(thread_id)))
+                counts[";".join(reversed(stack))] += 1
+            time.sleep(interval)
+    finally:
+        _sampling_lock.release()
+
+    return "".join(f"{stack} {count}\n" for stack, count in counts.most_common())
+
+
+def _profile_to_file(seconds: float):
+    try:
+        collapsed = sample_stacks(seconds)
+    except ProfilerBusyError as e:
+        logger.warning("Signal profile skipped: %s", e)
+        return
+    path = os.path.join(
+        PROFILE_OUTPUT_DIR, f"profile-{os.getpid()}-{int(time.time())}.collapsed"
+    )
+    with open(path, "w") as f:
+        f.write(collapsed)
+    logger.info("Wrote %.0fs profile to %s", seconds, path)
+
+
+def install_signal_handler():
+    """Profile for SIGNAL_PROFILE_SECONDS on SIGUSR2, writing to PROFILE_OUTPUT_DIR"""
+    if not profiling_enabled() or not hasattr(signal, "SIGUSR2"):
+        return
+
+    def handle(signum, frame):
+        threading.Thread(
+            target=_profile_to_file,
+            args=(SIGNAL_PROFILE_SECONDS,),
+            name="signal-profiler",
+            daemon=True,
+        ).start()
+
+    try:
+        signal.signal(signal.SIGUSR2, handle)
+    except ValueError:
+        # Not on the main thread
+        logger.warning("Could not install SIGUSR2 profiler handler")
+
+
+def save_request_profile(request_id: str, profile: cProfile.Profile):
+    output = io.StringIO()
+    try:
+        stats = pstats.Stats(profile, stream=output)
+    except TypeError:
+        # The endpoint never ran, e.g. the request failed authentication
+        output.write("No endpoint call was profiled\n")
+    else:
+        stats.sort_stats("cumulative").print_stats(50)
+    with _request_profiles_lock:
+        _request_profiles[request_id] = output.getvalue()
+        while len(_request_profiles) > MAX_REQUEST_PROFILES:
+            _request_profiles.popitem(last=False)
+
+
+def get_request_profile(request_id: str) -> str | None:
+    with _request_profiles_lock:
+        return _request_profiles.get(request_id)
+
+
+def _profiled(call):
+    """Wrap an endpoint so it runs under the request's profiler, if any"""
+    if inspect.iscoroutinefunction(call):
+
+        @functools.wraps(call)
+        async def async_wrapper(*args, **kwargs):
+            profile = request_profile_var.get()
+            if profile is None:
+                return await call(*args, **kwargs)
+            profile.enable()
+            try:
+                return await call(*args, **kwargs)
+            finally:
+                profile.disable()
+
+        async_wrapper.profileable = True
+        return async_wrapper
+
+    @functools.wraps(call)
+    def wrapper(*args, **kwargs):
+        profile = request_profile_var.get()
+        if profile is None:
+            return call(*args, **kwargs)
+        # Sync endpoints run in a worker thread, cProfile has to be enabled there
+        return profile.runcall(call, *args, **kwargs)
+
+    wrapper.profileable = True
+    return wrapper
+
+
+def instrument_routes(routes: list):
+    """Make endpoints of routes profileable per request"""
+    if not profiling_enabled():
+        return
+    for route in routes:
+        if not isinstance(route, APIRoute):
+            continue
+        if not getattr(route.dependant.call, "profileable", False):
+            route.dependant.call = _profiled(route.dependant.call)
@@ -0,0 +1,303 @@
+"""Cache shared by all worker processes on one host.
+
+Entries live in an SQLite database in WAL mode, so every uvicorn worker
+sees what any other worker stored, and upstream responses (tokens, search
+results, key sets) are fetched once per host rather than once per worker.
+A small in-process tier in front of it serves repeated reads without
+touching SQLite for up to local_ttl seconds. While the database is
+unavailable that tier holds entries until their own expiry instead.
+
+Values must be JSON-serializable. Every entry has a TTL; the database is
+bounded by entry count and total bytes, evicting entries closest to expiry
+first.
+
+Anything that can write the database can feed values to every worker, so
+the cache only uses a file owned by this user with mode 0600, and works
+from memory only otherwise. Still, don't cache anything that decides
+whether to trust a request, such as signing keys.
+
+Usage:
+
+    from databutton_app.shared_cache import shared_cache
+
+    token = shared_cache.get("ebay:token")
+    if token is None:
+        token = fetch_token()
+        shared_cache.set("ebay:token", token, ttl=3600)
+"""
+
+import errno
+import json
+import logging
+import os
+import sqlite3
+import stat
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+SHARED_CACHE_PATH = os.environ.get(
+    "SHARED_CACHE_PATH",
+    str(Path(__file__).resolve().parents[1] / "data" / "shared_cache.sqlite3"),
+)
+SHARED_CACHE_MAX_ENTRIES = int(os.environ.get("SHARED_CACHE_MAX_ENTRIES", "10000"))
+SHARED_CACHE_MAX_MB = float(os.environ.get("SHARED_CACHE_MAX_MB", "64"))
+# How long a worker may serve an entry from memory without checking the database
+SHARED_CACHE_LOCAL_TTL = float(os.environ.get("SHARED_CACHE_LOCAL_TTL", "5"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    expires_at REAL NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_expires_at ON entries (expires_at);
+"""
+
+_MISSING = object()
+
+
+class SharedCache:
+    def __init__(
+        self,
+        path: str,
+        max_entries: int = 10000,
+        max_bytes: int = 64 * 1024 * 1024,
+        local_maxsize: int = 1024,
+        local_ttl: float = 5.0,
+        prune_interval: int = 100,
+    ):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.local_maxsize = local_maxsize
+        self.local_ttl = local_ttl
+        self.prune_interval = prune_interval
+
+        self._local = threading.local()
+        # key -> (value, expires_at) with expires_at in wall clock time
+        self._memory: OrderedDict[str, tuple[Any, float]] = OrderedDict()
+        self._memory_lock = threading.Lock()
+        self._sets_since_prune = 0
+        self._disabled_until = 0.0
+        self._untrusted = False
+
+    def _check_trusted(self):
+        """Raise PermissionError unless the database and its journals are ours and private"""
+        # Entries may hold credentials; SQLite gives its journal files the same mode
+        try:
+            fd = os.open(self.path, os.O_CREAT | os.O_RDWR | os.O_NOFOLLOW, 0o600)
+        except OSError as e:
+            if e.errno == errno.ELOOP:
+                raise PermissionError(f"{self.path} is a symlink")
+            raise
+        try:
+            files = [(self.path, os.fstat(fd))]
+        finally:
+            os.close(fd)
+        for suffix in ("-wal", "-shm"):
+            try:
+                files.append((self.path + suffix, os.lstat(self.path + suffix)))
+            except FileNotFoundError:
+                pass
+        for path, info in files:
+            if not stat.S_ISREG(info.st_mode) or info.st_uid != os.getuid():
+                raise PermissionError(f"{path} is not a regular file owned by this user")
+            if stat.S_IMODE(info.st_mode) & 0o077:
+                raise PermissionError(f"{path} is accessible to other users")
+
+    def _connection(self) -> sqlite3.Connection | None:
+        """This thread's connection, or None while the database is unavailable"""
+        if self._untrusted or time.monotonic() < self._disabled_until:
+            return None
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            try:
+                Path(self.path).parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+                self._check_trusted()
+            except PermissionError as e:
+                logger.error("Not using shared cache database, using process memory only: %s", e)
+                self._untrusted = True
+                return None
+            except OSError as e:
+                self._backend_failed(e)
+                return None
+            try:
+                conn = sqlite3.connect(self.path, isolation_level=None, timeout=5)
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+                conn.executescript(SCHEMA)
+            except (OSError, sqlite3.Error) as e:
+                self._backend_failed(e)
+                return None
+            self._local.conn = conn
+        return conn
+
+    def _backend_failed(self, error: Exception):
+        # Serve from memory only for a while instead of failing every call
+        logger.warning("Shared cache unavailable, using process memory only: %s", error)
+        self._disabled_until = time.monotonic() + 30
+
+    def _remember(self, key: str, value: Any, expires_at: float, shared: bool = True):
+        """Keep value in memory, only for local_ttl if the database also has it"""
+        if shared:
+            expires_at = min(expires_at, time.time() + self.local_ttl)
+        with self._memory_lock:
+            self._memory[key] = (value, expires_at)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.local_maxsize:
+                self._memory.popitem(last=False)
+
+    def _memory_get(self, key: str) -> Any:
+        with self._memory_lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                return _MISSING
+            value, expires_at = entry
+            if expires_at <= time.time():
+                del self._memory[key]
+                return _MISSING
+            self._memory.move_to_end(key)
+            return value
+
+    def get(self, key: str, default: Any = None) -> Any:
+        value = self._memory_get(key)
+        if value is not _MISSING:
+            return value
+
+        conn = self._connection()
+        if conn is None:
+            return default
+        try:
+            row = conn.execute(
+                "SELECT value, expires_at FROM entries WHERE key = ? AND expires_at > ?",
+                (key, time.time()),
+            ).fetchone()
+        except sqlite3.Error as e:
+            self._backend_failed(e)
+            return default
+        if row is None:
+            return default
+
+        value = json.loads(row[0])
+        self._remember(key, value, row[1])
+        return value
+
+    def set(self, key: str, value: Any, ttl: float):
+        expires_at = time.time() + ttl
+        conn = self._connection()
+        self._remember(key, value, expires_at, shared=conn is not None)
+        if conn is None:
+            return
+        data = json.dumps(value, separators=(",", ":"))
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, expires_at, size) VALUES (?, ?, ?, ?)",
+                (key, data, expires_at, len(data)),
+            )
+        except sqlite3.Error as e:
+            self._backend_failed(e)
+            self._remember(key, value, expires_at, shared=False)
+            return
+
+        self._sets_since_prune += 1
+        if self._sets_since_prune >= self.prune_interval:
+            self._sets_since_prune = 0
+            self.prune()
+
+    def add(self, key: str, value: Any, ttl: float) -> bool:
+        """Store value only if key is absent or expired, atomically across workers.
+
+        Returns whether it was stored, so it can serve as a lease that only
+        one worker at a time holds.
+        """
+        now = time.time()
+        conn = self._connection()
+        if conn is None:
+            with self._memory_lock:
+                entry = self._memory.get(key)
+                if entry is not None and entry[1] > now:
+                    return False
+                self._memory[key] = (value, now + ttl)
+            return True
+
+        data = json.dumps(value, separators=(",", ":"))
+        try:
+            cursor = conn.execute(
+                "INSERT INTO entries (key, value, expires_at, size) VALUES (?, ?, ?, ?)"
+                " ON CONFLICT (key) DO UPDATE SET value = excluded.value,"
+                " expires_at = excluded.expires_at, size = excluded.size"
+                " WHERE entries.expires_at <= ?",
+                (key, data, now + ttl, len(data), now),
+            )
+        except sqlite3.Error as e:
+            self._backend_failed(e)
+            return False
+        return cursor.rowcount == 1
+
+    def delete(self, key: str):
+        with self._memory_lock:
+            self._memory.pop(key, None)
+        conn = self._connection()
+        if conn is None:
+            return
+        try:
+            conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+        except sqlite3.Error as e:
+            self._backend_failed(e)
+
+    def prune(self):
+        """Drop expired entries, then the ones closest to expiry until within limits"""
+        conn = self._connection()
+        if conn is None:
+            return
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute("DELETE FROM entries WHERE expires_at <= ?", (time.time(),))
+                count, total = conn.execute(
+                    "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+                ).fetchone()
+                excess = count - self.max_entries
+                if total > self.max_bytes:
+                    # Rough estimate of how many entries to drop to get within max_bytes
+                    excess = max(excess, int(count * (1 - self.max_bytes / total)) + 1)
+                if excess > 0:
+                    conn.execute(
+                        "DELETE FROM entries WHERE key IN"
+                        " (SELECT key FROM entries ORDER BY expires_at LIMIT ?)",
+                        (excess,),
+                    )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        except sqlite3.Error as e:
+            self._backend_failed(e)
+
+    def stats(self) -> dict[str, int]:
+        with self._memory_lock:
+            local_size = len(self._memory)
+        conn = self._connection()
+        count = total = 0
+        if conn is not None:
+            try:
+                count, total = conn.execute(
+                    "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+                ).fetchone()
+            except sqlite3.Error as e:
+                self._backend_failed(e)
+        return {"local_entries": local_size, "shared_entries": count, "shared_bytes": total}
+
+
+shared_cache = SharedCache(
+    SHARED_CACHE_PATH,
+    max_entries=SHARED_CACHE_MAX_ENTRIES,
+    max_bytes=int(SHARED_CACHE_MAX_MB * 1024 * 1024),
+    local_ttl=SHARED_CACHE_LOCAL_TTL,
+)
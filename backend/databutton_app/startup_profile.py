@@ -0,0 +1,84 @@
+"""Startup timing instrumentation.
+
+Records how long each API module takes to import, how long each router takes
+to register, and how long the first request to each endpoint takes. The
+report is available as JSON from `python main.py --startup-report` and from
+the /debug/startup endpoint.
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Cap on endpoints tracked for first-request timings
+MAX_FIRST_REQUESTS = 200
+
+
+class StartupProfile:
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.app_created_at: float | None = None
+        self.first_request_at: float | None = None
+        self.module_imports: dict[str, float] = {}
+        self.router_registrations: dict[str, float] = {}
+        self.first_requests: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def measure(self, timings: dict[str, float], name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                timings[name] = elapsed
+
+    def module_import(self, name: str):
+        return self.measure(self.module_imports, name)
+
+    def router_registration(self, name: str):
+        return self.measure(self.router_registrations, name)
+
+    def mark_app_created(self):
+        self.app_created_at = time.perf_counter()
+
+    def record_first_request(self, endpoint: str, elapsed: float):
+        """Record a request's latency if it is the first seen for this endpoint"""
+        with self._lock:
+            if self.first_request_at is None:
+                self.first_request_at = time.perf_counter() - elapsed
+            if endpoint not in self.first_requests and len(self.first_requests) < MAX_FIRST_REQUESTS:
+                self.first_requests[endpoint] = elapsed
+
+    def has_first_request(self, endpoint: str) -> bool:
+        return endpoint in self.first_requests
+
+    def report(self) -> dict:
+        def ms(seconds: float | None) -> float | None:
+            return None if seconds is None else round(seconds * 1000, 2)
+
+        def since_start(at: float | None) -> float | None:
+            return None if at is None else ms(at - self.started_at)
+
+        with self._lock:
+            return {
+                "pid": os.getpid(),
+                "create_app_ms": since_start(self.app_created_at),
+                "first_request_after_ms": since_start(self.first_request_at),
+                "module_import_ms": {
+                    name: ms(seconds) for name, seconds in self.module_imports.items()
+                },
+                "total_module_import_ms": ms(sum(self.module_imports.values())),
+                "router_registration_ms": {
+                    name: ms(seconds)
+                    for name, seconds in self.router_registrations.items()
+                },
+                "first_request_ms": {
+                    name: ms(seconds) for name, seconds in self.first_requests.items()
+                },
+            }
+
+
+startup_profile = StartupProfile()
@@ -3,3 +3,4 @@
 uv venv
 source ./venv/bin/activate
 uv pip install -r requirements.txt
+python -m app.libs.nltk_resources
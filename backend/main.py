@@ -1,12 +1,48 @@
+from databutton_app.startup_profile import startup_profile
+
+import argparse
+import logging
 import os
 import pathlib
 import json
 import dotenv
-from fastapi import FastAPI, APIRouter, Depends
+from fastapi import FastAPI, APIRouter, Depends, Header, HTTPException
+from fastapi.responses import PlainTextResponse
 
 dotenv.load_dotenv()
 
-from databutton_app.mw.auth_mw import AuthConfig, get_authorized_user
+from databutton_app.logging_config import setup_logging
+
+setup_logging()
+logger = logging.getLogger(__name__)
+
+from app.env import Mode, mode
+from databutton_app.mw.auth_mw import AuthConfig, get_authorized_user, get_jwks_client
+from databutton_app.mw.startup_mw import FirstRequestTimingMiddleware
+from databutton_app.mw.request_id_mw import RequestIdMiddleware
+from databutton_app.mw.metrics_mw import MetricsMiddleware
+from databutton_app.mw.profile_mw import RequestProfileMiddleware
+from databutton_app.mw.compression_mw import CompressionMiddleware
+from databutton_app.metrics import registry as metrics_registry
+from databutton_app import profiler
+from databutton_app.lazy_router import (
+    add_lazy_routes,
+    install_lazy_openapi,
+    warm_up_lazy_routers,
+)
+
+# Register routes from module sources and import API modules on first use
+LAZY_ROUTERS = os.environ.get("LAZY_ROUTERS", "0") == "1"
+# Import lazily registered API modules in the background after startup
+ROUTER_WARMUP = os.environ.get("ROUTER_WARMUP", "1") == "1"
+# Serve Prometheus metrics at /metrics
+METRICS_ENDPOINT = os.environ.get("METRICS_ENDPOINT", "1") == "1"
+# Compress JSON and text responses of at least this many bytes, 0 disables
+COMPRESSION_MIN_SIZE = int(os.environ.get("COMPRESSION_MIN_SIZE", "1024"))
+# Serve /debug/* endpoints, on by default outside production
+DEBUG_ENDPOINTS = os.environ.get(
+    "DEBUG_ENDPOINTS", "1" if mode == Mode.DEV else "0"
+) == "1"
 
 
 def get_router_config() -> dict:
@@ -22,11 +58,26 @@ def is_auth_disabled(router_config: dict, name: str) -> bool:
     return router_config["routers"][name]["disableAuth"]
 
 
-def import_api_routers() -> APIRouter:
-    """Create top level router including all user defined endpoints."""
+def get_enabled_routers() -> set[str] | None:
+    """Names of the API routers this deployment serves, None serves all of them"""
+    enabled = os.environ.get("ENABLED_ROUTERS", "").strip()
+    if not enabled:
+        return None
+    return {name.strip() for name in enabled.split(",") if name.strip()}
+
+
+def import_api_routers(lazy: bool = False) -> tuple[APIRouter, list]:
+    """Create top level router including all user defined endpoints.
+
+    When lazy is set, routes are registered from each module's source and the
+    module itself is imported on the first request to one of them. Returns
+    the router and the lazily registered modules still to be loaded.
+    """
     routes = APIRouter(prefix="/routes")
+    lazy_apps = []
 
     router_config = get_router_config()
+    enabled_routers = get_enabled_routers()
 
     src_path = pathlib.Path(__file__).parent
 
@@ -41,26 +92,45 @@ def import_api_routers() -> APIRouter:
     api_module_prefix = "app.apis."
 
     for name in api_names:
-        print(f"Importing API: {name}")
+        if enabled_routers is not None and name not in enabled_routers:
+            logger.info("Skipping disabled API: %s", name)
+            continue
+
         try:
-            api_module = __import__(api_module_prefix + name, fromlist=[name])
+            dependencies = (
+                []
+                if is_auth_disabled(router_config, name)
+                else [Depends(get_authorized_user)]
+            )
+
+            if lazy:
+                logger.info("Registering lazy API: %s", name)
+                with startup_profile.router_registration(name):
+                    lazy_apps.append(
+                        add_lazy_routes(
+                            routes,
+                            name,
+                            api_module_prefix + name,
+                            apis_path / name / "__init__.py",
+                            dependencies,
+                        )
+                    )
+                continue
+
+            logger.info("Importing API: %s", name)
+            with startup_profile.module_import(name):
+                api_module = __import__(api_module_prefix + name, fromlist=[name])
             api_router = getattr(api_module, "router", None)
             if isinstance(api_router, APIRouter):
-                routes.include_router(
-                    api_router,
-                    dependencies=(
-                        []
-                        if is_auth_disabled(router_config, name)
-                        else [Depends(get_authorized_user)]
-                    ),
-                )
+                with startup_profile.router_registration(name):
+                    routes.include_router(api_router, dependencies=dependencies)
         except Exception as e:
             print(e)
             continue
 
     print(routes.routes)
 
-    return routes
+    return routes, lazy_apps
 
 
 def get_firebase_config() -> dict | None:
@@ -77,7 +147,71 @@ def get_firebase_config() -> dict | None:
 def create_app() -> FastAPI:
     """Create the app. This is called by uvicorn with the factory option to construct the app object."""
     app = FastAPI()
-    app.include_router(import_api_routers())
+    if COMPRESSION_MIN_SIZE > 0:
+        app.add_middleware(CompressionMiddleware, minimum_size=COMPRESSION_MIN_SIZE)
+    app.add_middleware(FirstRequestTimingMiddleware)
+    app.add_middleware(MetricsMiddleware)
+    if profiler.profiling_enabled():
+        app.add_middleware(RequestProfileMiddleware)
+    app.add_middleware(RequestIdMiddleware)
+    routes, lazy_apps = import_api_routers(lazy=LAZY_ROUTERS)
+    app.include_router(routes)
+    profiler.instrument_routes(app.routes)
+    app.state.lazy_routers = lazy_apps
+    if lazy_apps:
+        install_lazy_openapi(app, lazy_apps)
+
+    if METRICS_ENDPOINT:
+
+        @app.get("/metrics", include_in_schema=False)
+        def get_metrics() -> PlainTextResponse:
+            return PlainTextResponse(
+                metrics_registry.render(),
+                media_type="text/plain; version=0.0.4; charset=utf-8",
+            )
+
+    if profiler.profiling_enabled():
+        profiler.install_signal_handler()
+
+        def require_profiler_token(x_profiler_token: str | None = Header(None)):
+            if not profiler.is_authorized(x_profiler_token):
+                raise HTTPException(status_code=403, detail="Invalid profiler token")
+
+        @app.get(
+            "/debug/profile",
+            include_in_schema=False,
+            dependencies=[Depends(require_profiler_token)],
+        )
+        def get_profile(seconds: float = 10, rate: float = 100) -> PlainTextResponse:
+            """Sample this worker's stacks and return them in collapsed format"""
+            try:
+                return PlainTextResponse(profiler.sample_stacks(seconds, rate))
+            except profiler.ProfilerBusyError as e:
+                raise HTTPException(status_code=409, detail=str(e))
+
+        @app.get(
+            "/debug/profiles/{profile_id}",
+            include_in_schema=False,
+            dependencies=[Depends(require_profiler_token)],
+        )
+        def get_request_profile(profile_id: str) -> PlainTextResponse:
+            """cProfile stats of a request made with the X-Profile header"""
+            stats = profiler.get_request_profile(profile_id)
+            if stats is None:
+                raise HTTPException(status_code=404, detail="Profile not found")
+            return PlainTextResponse(stats)
+
+    if DEBUG_ENDPOINTS:
+
+        @app.get("/debug/startup", include_in_schema=False)
+        def get_startup_report() -> dict:
+            return startup_profile.report()
+
+    if lazy_apps and ROUTER_WARMUP:
+
+        @app.on_event("startup")
+        def warm_up_routers():
+            warm_up_lazy_routers(app, lazy_apps)
 
     for route in app.routes:
         if hasattr(route, "methods"):
@@ -98,8 +232,35 @@ def create_app() -> FastAPI:
         }
 
         app.state.auth_config = AuthConfig(**auth_config)
+        # Prefetch signing keys so the first requests don't wait on them
+        get_jwks_client(app.state.auth_config.jwks_url)
 
+    startup_profile.mark_app_created()
     return app
 
 
 app = create_app()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--startup-report",
+        nargs="?",
+        const="-",
+        metavar="PATH",
+        help="Write startup timings as JSON to PATH, or stdout",
+    )
+    args = parser.parse_args()
+
+    if args.startup_report:
+        # Include import times of lazily registered routers too
+        for lazy_app in app.state.lazy_routers:
+            lazy_app.load(app)
+
+        report = json.dumps(startup_profile.report(), indent=2)
+        if args.startup_report == "-":
+            print(report)
+        else:
+            with open(args.startup_report, "w") as f:
+                f.write(report)
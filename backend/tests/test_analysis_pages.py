@@ -0,0 +1,98 @@
+"""Paginated price analyses served from the analysis cache."""
+
+import os
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.apis import price_analysis
+from databutton_app import shared_cache as shared_cache_module
+from databutton_app.shared_cache import SharedCache
+
+
+class Clock:
+    """Stands in for the time module in shared_cache, so tests can skip ahead"""
+
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self) -> float:
+        return self.now
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(shared_cache_module, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def client(monkeypatch):
+    competitors = [
+        price_analysis.CompetitorListing(
+            title=f"Listing {i}", price=10.0 + i, platform="eBay",
+            url=f"https://example.com/{i}", date_listed="2026-01-01",
+        )
+        for i in range(30)
+    ]
+    monkeypatch.setattr(price_analysis, "get_competitor_listings", lambda *args, **kwargs: competitors)
+
+    app = FastAPI()
+    app.include_router(price_analysis.router)
+    return TestClient(app)
+
+
+def use_analysis_cache(monkeypatch, cache: SharedCache):
+    monkeypatch.setattr(price_analysis, "analysis_cache", cache)
+
+
+def page_through(client, analysis_id: str, cursor: str, clock: Clock, wait: float) -> list:
+    items = []
+    while cursor:
+        clock.now += wait
+        response = client.get(
+            f"/analyze-price/{analysis_id}/competitors", params={"cursor": cursor, "limit": 10}
+        )
+        assert response.status_code == 200, response.text
+        items.extend(response.json()["items"])
+        cursor = response.json()["next_cursor"]
+    return items
+
+
+def test_pages_outlive_local_ttl_without_database(monkeypatch, tmp_path, client, clock):
+    path = str(tmp_path / "analyses.sqlite3")
+    open(path, "w").close()
+    os.chmod(path, 0o644)  # Untrusted, so the cache works from memory only
+    use_analysis_cache(monkeypatch, SharedCache(path, local_ttl=5))
+
+    first = client.post("/analyze-price", json={"keywords": "camera", "page_size": 10}).json()
+    items = page_through(client, first["analysis_id"], first["competitors_cursor"], clock, wait=30)
+
+    assert [item["title"] for item in first["active_competitors"] + items] == [
+        f"Listing {i}" for i in range(30)
+    ]
+
+
+def test_pages_are_served_by_other_workers(monkeypatch, tmp_path, client, clock):
+    path = str(tmp_path / "analyses.sqlite3")
+    use_analysis_cache(monkeypatch, SharedCache(path))
+    first = client.post("/analyze-price", json={"keywords": "camera", "page_size": 10}).json()
+
+    use_analysis_cache(monkeypatch, SharedCache(path))
+    items = page_through(client, first["analysis_id"], first["competitors_cursor"], clock, wait=30)
+
+    assert len(items) == 20
+
+
+def test_expired_analysis_is_not_found(monkeypatch, tmp_path, client, clock):
+    use_analysis_cache(monkeypatch, SharedCache(str(tmp_path / "analyses.sqlite3")))
+    first = client.post("/analyze-price", json={"keywords": "camera", "page_size": 10}).json()
+
+    clock.now += price_analysis.ANALYSIS_CACHE_TTL + 1
+    response = client.get(f"/analyze-price/{first['analysis_id']}/competitors")
+    assert response.status_code == 404
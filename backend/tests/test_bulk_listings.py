@@ -0,0 +1,42 @@
+"""Errors reported per item by the bulk listing generator."""
+
+from app.apis import listing_ai
+from app.apis.listing_ai import BulkListingItem, GenerateDescriptionRequest, GenerateTitleRequest
+
+
+def fail(message: str):
+    def raise_error(*args, **kwargs):
+        raise RuntimeError(message)
+    return raise_error
+
+
+def items() -> list[BulkListingItem]:
+    return [
+        BulkListingItem(
+            title=GenerateTitleRequest(product_name="Camera"),
+            description=GenerateDescriptionRequest(product_name="Camera"),
+        ),
+        BulkListingItem(description=GenerateDescriptionRequest(product_name="Lens")),
+    ]
+
+
+def test_title_and_description_errors_are_both_reported(monkeypatch):
+    monkeypatch.setattr(listing_ai, "build_titles", fail("tagger unavailable"))
+    monkeypatch.setattr(listing_ai, "render_description", fail("template missing"))
+
+    results = list(listing_ai.iter_bulk_listings(items()))
+
+    assert results[0].error == "tagger unavailable; template missing"
+    # The title error belongs to items that asked for a title
+    assert results[1].error == "template missing"
+
+
+def test_one_failing_part_keeps_the_other(monkeypatch):
+    monkeypatch.setattr(listing_ai, "build_titles", fail("tagger unavailable"))
+    monkeypatch.setattr(listing_ai, "render_description", lambda request: f"A {request.product_name}")
+
+    results = list(listing_ai.iter_bulk_listings(items()))
+
+    assert (results[0].title, results[0].description) == (None, "A Camera")
+    assert results[0].error == "tagger unavailable"
+    assert results[1].error is None
@@ -0,0 +1,145 @@
+"""JWKSKeyStore against a local stand-in for the JWKS endpoint."""
+
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import jwt
+import pytest
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jwt.algorithms import RSAAlgorithm
+
+from databutton_app.jwks import JWKSKeyStore
+
+
+def make_key(kid: str):
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    jwk = RSAAlgorithm.to_jwk(private_key.public_key(), as_dict=True)
+    jwk.update(kid=kid, alg="RS256", use="sig")
+    return private_key, jwk
+
+
+class JWKSServer:
+    """Serves a key set that tests can rotate, counting fetches"""
+
+    def __init__(self, jwks: list[dict], max_age: int = 3600, delay: float = 0.0):
+        self.jwks = jwks
+        self.max_age = max_age
+        self.delay = delay
+        self.fetches = 0
+        self._lock = threading.Lock()
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with server._lock:
+                    server.fetches += 1
+                    body = json.dumps({"keys": server.jwks}).encode()
+                # Slow responses keep concurrent requests waiting on the same fetch
+                time.sleep(server.delay)
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Cache-Control", f"public, max-age={server.max_age}")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/jwks"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def rotate(self, jwks: list[dict]):
+        with self._lock:
+            self.jwks = jwks
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture(scope="module")
+def keys():
+    return {kid: make_key(kid) for kid in ("k1", "k2")}
+
+
+@pytest.fixture
+def server(keys):
+    server = JWKSServer([keys["k1"][1]])
+    yield server
+    server.close()
+
+
+def wait_for(condition, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_prefetches_keys_on_start(server):
+    store = JWKSKeyStore(server.url)
+    store.start()
+    try:
+        wait_for(lambda: store._keys)
+
+        assert store.get_signing_key("k1").key_id == "k1"
+        assert server.fetches == 1
+    finally:
+        store.stop()
+
+
+def test_rotation_under_concurrent_load_fetches_once(server, keys):
+    store = JWKSKeyStore(server.url, min_refetch_interval=30)
+    store.refresh()
+    server.rotate([keys["k1"][1], keys["k2"][1]])
+    server.delay = 0.2
+
+    token = jwt.encode({"sub": "user"}, keys["k2"][0], algorithm="RS256", headers={"kid": "k2"})
+    barrier = threading.Barrier(32)
+
+    def verify():
+        barrier.wait()
+        signing_key = store.get_signing_key(jwt.get_unverified_header(token)["kid"])
+        return jwt.decode(token, signing_key.key, algorithms=["RS256"])["sub"]
+
+    with ThreadPoolExecutor(max_workers=32) as executor:
+        subjects = list(executor.map(lambda _: verify(), range(32)))
+
+    assert subjects == ["user"] * 32
+    # One prefetch and one refetch shared by every request that saw the new kid
+    assert server.fetches == 2
+
+
+def test_unknown_kid_refetches_are_rate_limited(server):
+    store = JWKSKeyStore(server.url, min_refetch_interval=30)
+    store.refresh()
+
+    for _ in range(20):
+        with pytest.raises(LookupError):
+            store.get_signing_key("missing")
+
+    assert server.fetches == 2
+
+
+def test_background_refresh_follows_max_age(server, keys):
+    server.max_age = 1
+    store = JWKSKeyStore(server.url, min_refetch_interval=0.1, refresh_margin=0.5)
+    store.start()
+    try:
+        wait_for(lambda: store._keys)
+
+        server.rotate([keys["k2"][1]])
+        wait_for(lambda: "k2" in store._keys)
+        fetches = server.fetches
+
+        # Picked up by the refresher, so the request path doesn't fetch
+        assert store.get_signing_key("k2").key_id == "k2"
+        assert server.fetches == fetches
+    finally:
+        store.stop()
@@ -0,0 +1,55 @@
+"""Lazy loading of the NLTK tokenizer and tagger."""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import nltk.tag.perceptron
+import nltk.tokenize
+
+from app.libs import nltk_resources
+
+
+def test_importing_listing_ai_does_not_load_nltk(tmp_path):
+    # A fresh interpreter, since other tests may already have imported nltk
+    script = (
+        "import sys\n"
+        "import app.apis.listing_ai\n"
+        "from app.libs import nltk_resources\n"
+        "nltk_resources.verify_nltk_resources()\n"
+        "assert 'nltk' not in sys.modules, 'nltk imported'\n"
+        "assert nltk_resources._tagger is None, 'tagger loaded'\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", script],
+        capture_output=True, text=True, cwd=Path(__file__).resolve().parents[1],
+        env={**os.environ, "NLTK_DATA_DIR": str(tmp_path)},
+    )
+
+    assert result.returncode == 0, result.stderr
+
+
+def test_tagger_is_loaded_once_and_shared(monkeypatch):
+    loaded = []
+
+    class Tagger:
+        def __init__(self):
+            loaded.append(self)
+
+        def tag(self, tokens):
+            return [(token, "NN") for token in tokens]
+
+        def tag_sents(self, sentences):
+            return [self.tag(tokens) for tokens in sentences]
+
+    monkeypatch.setattr(nltk.tag.perceptron, "PerceptronTagger", Tagger)
+    monkeypatch.setattr(nltk.tokenize, "word_tokenize", str.split)
+    monkeypatch.setattr(nltk_resources, "_tagger", None)
+    monkeypatch.setattr(nltk_resources, "_word_tokenize", None)
+
+    assert nltk_resources.pos_tag(nltk_resources.word_tokenize("red shoes")) == [
+        ("red", "NN"), ("shoes", "NN")
+    ]
+    assert nltk_resources.pos_tag_sents([["bag"], ["hat"]]) == [[("bag", "NN")], [("hat", "NN")]]
+    assert len(loaded) == 1
@@ -0,0 +1,135 @@
+"""SalesEventStore rollups and the analytics summary built from them."""
+
+from collections import namedtuple
+from datetime import date, datetime, timezone
+
+import pytest
+
+from app.apis import analytics
+from app.libs.sales_events import SalesEventStore
+
+Event = namedtuple("Event", "event_type platform category item_id price cost occurred_at")
+
+
+def at(day: str, hour: int = 12) -> datetime:
+    return datetime.fromisoformat(day).replace(hour=hour, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SalesEventStore(str(tmp_path / "events.sqlite3"))
+
+
+@pytest.fixture
+def seeded(store):
+    # Sunday 2026-02-01 to Monday 2026-03-02: two months and three ISO weeks
+    store.ingest("seller", [
+        Event("listed", "eBay", "Shoes", "a", 50, None, at("2026-01-30")),
+        Event("listed", "eBay", "Bags", "b", 80, None, at("2026-01-31")),
+        Event("sold", "eBay", "Shoes", "a", 45, 20, at("2026-02-01")),
+        Event("listed", "Mercari", "Shoes", "c", 30, None, at("2026-02-01")),
+        Event("sold", "Mercari", "Shoes", "c", 30, None, at("2026-02-02")),
+        Event("sold", "eBay", "Bags", "b", 90, 25, at("2026-03-02")),
+    ])
+    return store
+
+
+def test_day_week_and_month_rollups(seeded):
+    assert seeded.series("seller", date(2026, 2, 1), date(2026, 3, 2), "day") == [
+        ("2026-02-01", 1, 45.0),
+        ("2026-02-02", 1, 30.0),
+        ("2026-03-02", 1, 90.0),
+    ]
+    # Weeks start on Monday, so Sunday the 1st belongs to the week of January 26th
+    assert seeded.series("seller", date(2026, 2, 1), date(2026, 3, 2), "week") == [
+        ("2026-01-26", 1, 45.0),
+        ("2026-02-02", 1, 30.0),
+        ("2026-03-02", 1, 90.0),
+    ]
+    # January only had listings
+    assert seeded.series("seller", date(2026, 1, 15), date(2026, 3, 2), "month") == [
+        ("2026-01-01", 0, 0.0),
+        ("2026-02-01", 2, 75.0),
+        ("2026-03-01", 1, 90.0),
+    ]
+
+
+def test_rollups_accumulate_across_ingests(seeded):
+    seeded.ingest("seller", [Event("sold", "eBay", "Shoes", "d", 10, None, at("2026-02-01", 18))])
+
+    assert seeded.series("seller", date(2026, 2, 1), date(2026, 2, 1), "day") == [
+        ("2026-02-01", 2, 55.0)
+    ]
+    assert seeded.version("seller") == 2
+
+
+def test_totals_and_inventory(seeded):
+    totals = {row["platform"]: row for row in seeded.platform_totals("seller")}
+    assert totals["eBay"] == {
+        "platform": "eBay", "sales": 2, "revenue": 135.0, "cost": 45.0,
+        "costed_revenue": 135.0, "listings": 2,
+    }
+    assert totals["Mercari"]["costed_revenue"] == 0.0
+
+    assert [row["category"] for row in seeded.category_totals("seller")] == ["Bags", "Shoes"]
+    assert seeded.platform_revenue("seller", date(2026, 2, 1), date(2026, 2, 28)) == {
+        "eBay": 45.0, "Mercari": 30.0
+    }
+
+    inventory = seeded.inventory("seller")
+    assert inventory["total_items"] == 3 and inventory["sold"] == 3 and inventory["active"] == 0
+    # 2, 1 and 30 days from listing to sale
+    assert inventory["average_days_to_sell"] == pytest.approx(11.0)
+
+
+def test_item_status_follows_event_order(store):
+    store.ingest("seller", [
+        Event("delisted", "eBay", "Shoes", "a", 0, None, at("2026-01-02")),
+        Event("listed", "eBay", "Shoes", "a", 50, None, at("2026-01-01")),
+        Event("listed", "eBay", "Shoes", "a", 40, None, at("2026-01-05")),
+    ])
+
+    # Listed, delisted, then relisted
+    inventory = store.inventory("seller")
+    assert (inventory["total_items"], inventory["active"], inventory["sold"]) == (1, 1, 0)
+
+
+def test_rejected_batch_stores_nothing(store):
+    with pytest.raises(ValueError):
+        store.ingest("seller", [
+            Event("listed", "eBay", "Shoes", "a", 50, None, at("2026-01-01")),
+            Event("returned", "eBay", "Shoes", "a", 50, None, at("2026-01-02")),
+        ])
+
+    assert store.version("seller") == 0
+    assert store.platform_totals("seller") == []
+
+
+def test_summary_reads_the_rollups(monkeypatch, seeded):
+    monkeypatch.setattr(analytics, "sales_event_store", seeded)
+
+    summary = analytics.compute_analytics_summary(
+        "seller", date(2026, 2, 1), date(2026, 3, 2), resolution="week"
+    )
+
+    assert summary.total_sales == 3
+    assert summary.total_revenue == 165.0
+    # Only the two eBay sales have a cost: (135 - 45) / 135
+    assert summary.profit_margin == 66.7
+    assert summary.trend_resolution == "week"
+    assert [(p.date, p.value) for p in summary.revenue_trend] == [
+        ("2026-01-26", 45.0), ("2026-02-02", 30.0), ("2026-02-09", 0.0),
+        ("2026-02-16", 0.0), ("2026-02-23", 0.0), ("2026-03-02", 90.0),
+    ]
+    assert summary.inventory_metrics.turnover_rate == 1.0
+    assert summary.top_categories[0].platform == "Bags"
+
+
+def test_summary_of_a_seller_without_events(monkeypatch, store):
+    monkeypatch.setattr(analytics, "sales_event_store", store)
+
+    summary = analytics.compute_analytics_summary("nobody")
+
+    assert summary.total_sales == 0 and summary.profit_margin == 0.0
+    assert len(summary.revenue_trend) == analytics.TREND_DAYS
+    assert all(point.value == 0 for point in summary.sales_trend)
@@ -0,0 +1,94 @@
+"""SharedCache with and without a usable database."""
+
+import os
+import time
+
+import pytest
+
+from databutton_app.shared_cache import SharedCache
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "cache.sqlite3")
+
+
+def untrusted(path: str) -> SharedCache:
+    """A cache whose database file other users can read, so it works from memory only"""
+    open(path, "w").close()
+    os.chmod(path, 0o644)
+    cache = SharedCache(path, local_ttl=0.05)
+    assert cache._connection() is None
+    return cache
+
+
+def stat_mode(path: str) -> int:
+    return os.stat(path).st_mode & 0o777
+
+
+def test_workers_share_entries(path):
+    first, second = SharedCache(path), SharedCache(path)
+    first.set("key", {"value": 1}, ttl=60)
+
+    assert second.get("key") == {"value": 1}
+    assert stat_mode(path) == 0o600
+
+
+def test_memory_tier_rechecks_the_database(path):
+    first, second = SharedCache(path, local_ttl=0.05), SharedCache(path, local_ttl=0.05)
+    first.set("key", 1, ttl=60)
+    assert second.get("key") == 1
+
+    first.delete("key")
+    time.sleep(0.1)
+    assert second.get("key") is None
+
+
+def test_untrusted_database_is_not_used(path):
+    cache = untrusted(path)
+    cache.set("key", 1, ttl=60)
+
+    assert cache.get("key") == 1
+    assert os.path.getsize(path) == 0
+
+
+def test_symlinked_database_is_not_used(tmp_path, path):
+    os.symlink(tmp_path / "elsewhere.sqlite3", path)
+
+    assert SharedCache(path)._connection() is None
+    assert not (tmp_path / "elsewhere.sqlite3").exists()
+
+
+def test_without_database_entries_outlive_local_ttl(path):
+    cache = untrusted(path)
+    cache.set("token", "abc", ttl=0.5)
+
+    time.sleep(0.2)
+    assert cache.get("token") == "abc"
+    time.sleep(0.4)
+    assert cache.get("token") is None
+
+
+def test_without_database_add_is_a_lease(path):
+    cache = untrusted(path)
+
+    assert cache.add("lease", "a", ttl=0.2)
+    assert not cache.add("lease", "b", ttl=0.2)
+    time.sleep(0.3)
+    assert cache.add("lease", "b", ttl=0.2)
+
+
+def test_add_is_a_lease_across_workers(path):
+    first, second = SharedCache(path), SharedCache(path)
+
+    assert first.add("lease", "a", ttl=60)
+    assert not second.add("lease", "b", ttl=60)
+
+
+def test_prune_evicts_entries_closest_to_expiry(path):
+    cache = SharedCache(path, max_entries=3, local_ttl=0)
+    for i in range(5):
+        cache.set(f"key{i}", i, ttl=60 + i)
+    cache.prune()
+
+    assert [cache.get(f"key{i}") for i in range(5)] == [None, None, 2, 3, 4]
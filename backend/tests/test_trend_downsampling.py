@@ -0,0 +1,29 @@
+"""Downsampled summary trends."""
+
+from datetime import date, timedelta
+
+from app.apis.analytics import build_time_series
+
+
+def test_downsampled_series_share_dates_and_keep_both_peaks():
+    buckets = [date(2020, 1, 1) + timedelta(days=i) for i in range(1000)]
+    # Revenue peaks on day 300, sales on day 700. The store returns ISO dates
+    rows = [
+        (day.isoformat(), 50 if i == 700 else 1, 5000.0 if i == 300 else 10.0)
+        for i, day in enumerate(buckets)
+    ]
+
+    revenue_trend, sales_trend = build_time_series(rows, buckets, max_points=100)
+
+    assert len(revenue_trend) <= 100
+    assert [p.date for p in revenue_trend] == [p.date for p in sales_trend]
+    assert buckets[300].isoformat() in [p.date for p in revenue_trend]
+    assert buckets[700].isoformat() in [p.date for p in sales_trend]
+
+
+def test_short_series_are_not_downsampled():
+    buckets = [date(2020, 1, 1) + timedelta(days=i) for i in range(30)]
+
+    revenue_trend, sales_trend = build_time_series([], buckets, max_points=30)
+
+    assert len(revenue_trend) == len(sales_trend) == 30